@@ -0,0 +1,92 @@
+"""
+GitHub Batch Repository Details Tool for Braintrust
+
+This tool gets detailed information about many repositories in one call.
+Takes a list of owner/repo pairs, typically the top results of a search.
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from github_client import gather_limited, sync_handler
+from repository_details import RepositoryDetails, get_repository_details_handler_async
+from tool_registry import lazy_tool
+
+MAX_CONCURRENCY = 10
+
+
+class BatchRepositoryDetailsParams(BaseModel):
+    repositories: List[str]  # "owner/repo" pairs
+    concurrency: Optional[int] = 5  # max 10 requests in flight
+
+
+class BatchRepositoryDetailsItem(BaseModel):
+    repository: str
+    details: Optional[RepositoryDetails] = None
+    error: Optional[str] = None
+
+
+class BatchRepositoryDetailsResponse(BaseModel):
+    results: List[BatchRepositoryDetailsItem]
+    succeeded: int
+    failed: int
+
+
+async def _fetch_one(full_name: str) -> dict:
+    owner, _, repo = full_name.strip().partition("/")
+    if not owner or not repo or "/" in repo:
+        return {"repository": full_name, "error": "Expected repository as 'owner/repo'"}
+
+    try:
+        details = await get_repository_details_handler_async(owner, repo)
+        return {"repository": full_name, "details": details}
+    except Exception as e:
+        return {"repository": full_name, "error": str(e)}
+
+
+async def batch_repository_details_handler_async(
+    repositories: List[str], concurrency: int = 5
+):
+    """Get repository details for many repositories concurrently"""
+
+    concurrency = max(1, min(concurrency, MAX_CONCURRENCY))
+
+    # Each item reports its own error so one bad repo doesn't fail the batch
+    results = await gather_limited(
+        (_fetch_one(full_name) for full_name in repositories), concurrency
+    )
+    failed = sum(1 for result in results if "error" in result)
+
+    return {
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+    }
+
+
+batch_repository_details_handler = sync_handler(batch_repository_details_handler_async)
+
+TOOL = {
+    "name": "Get Repository Details (Batch)",
+    "slug": "batch-repository-details",
+    "description": """
+    Get detailed information about several GitHub repositories in one call.
+
+    Use this tool instead of calling repository-details repeatedly, for
+    example on the top results of search-repositories.
+
+    Parameters:
+    - repositories: list of "owner/repo" strings (e.g. ["pallets/flask", "django/django"])
+    - concurrency: how many repositories to fetch at once (max 10)
+
+    The output has one result per repository, in the order given:
+    - details: the same information repository-details returns
+    - error: why that repository could not be fetched (other results are unaffected)
+    """,
+    "handler": batch_repository_details_handler,
+    "parameters": BatchRepositoryDetailsParams,
+}
+
+# Registered with Braintrust on first access to `batch_repository_details`, see tool_registry.py
+__getattr__ = lazy_tool("batch_repository_details", TOOL)
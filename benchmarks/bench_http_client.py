@@ -0,0 +1,113 @@
+"""
+Benchmark: per-call latency with and without the shared connection pool
+
+Starts a local HTTP/1.1 keep-alive server that stands in for api.github.com
+and times N sequential GETs two ways:
+
+- unpooled: a fresh `httpx.AsyncClient` per call (new connection every time)
+- pooled: one client from `github_client.create_client()`, as the tools use
+
+Use --connect-delay-ms to simulate the extra cost of a TLS handshake on each
+new connection (the stand-in server is plain HTTP).
+
+Usage:
+    python benchmarks/bench_http_client.py --calls 200 --connect-delay-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from github_client import create_client  # noqa: E402
+
+PAYLOAD = json.dumps({"id": 1, "full_name": "octo/repo", "stargazers_count": 42}).encode()
+
+
+def make_handler(connect_delay: float):
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; without this, keep-alive
+        # connections stall on the Nagle/delayed-ACK interaction
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            # Called once per accepted connection - simulates handshake cost
+            if connect_delay:
+                time.sleep(connect_delay)
+            super().setup()
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(PAYLOAD)))
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+async def unpooled_get(url: str) -> httpx.Response:
+    async with httpx.AsyncClient() as client:
+        return await client.get(url)
+
+
+async def time_calls(get, url: str, calls: int) -> list:
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = await get(url)
+        response.raise_for_status()
+        response.json()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def run(url: str, calls: int):
+    report("unpooled", await time_calls(unpooled_get, url, calls))
+    async with create_client() as client:
+        report("pooled", await time_calls(client.get, url, calls))
+
+
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{label:<10} mean={statistics.mean(timings):7.3f}ms "
+        f"p50={statistics.median(timings):7.3f}ms p95={p95:7.3f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--connect-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_handler(args.connect_delay_ms / 1000)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/repos/octo/repo"
+
+    try:
+        print(f"{args.calls} calls, connect delay {args.connect_delay_ms}ms")
+        asyncio.run(run(url, args.calls))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: cold import time of each tool module
+
+Imports each handler module in a fresh interpreter under
+`python -X importtime` and reports its cumulative import time and the
+slowest modules it pulled in, so cold-start regressions show up. Also checks
+that importing a handler stays free of registration side effects: no
+`braintrust` import and nothing printed.
+
+Each module is imported --runs times and the fastest run is reported, as the
+first run also pays for writing bytecode caches.
+
+Usage:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --modules list_issues github_tools --top 15
+    python benchmarks/bench_import_time.py --max-ms 400   # exit 1 if any module is slower
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+TOOL_MODULES = [
+    "search_repositories",
+    "repository_details",
+    "list_issues",
+    "list_pull_requests",
+    "search_issues",
+    "repository_contents",
+    "user_info",
+    "repository_contributors",
+    "batch_repository_details",
+    "repository_overview",
+    "code_search",
+]
+
+# Imported by the child after the module under test, to report side effects
+PROBE = "import {module}, sys; sys.stderr.write('\\nbraintrust-loaded=%d\\n' % ('braintrust' in sys.modules))"
+
+
+def import_once(module: str) -> dict:
+    """Import `module` in a fresh interpreter and parse its -X importtime report"""
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr}")
+
+    braintrust = None
+    rows = []  # (depth, name, cumulative us), each module after its own imports
+    for line in result.stderr.splitlines():
+        if line.startswith("braintrust-loaded="):
+            braintrust = line.endswith("1")
+        elif line.startswith("import time:") and "self [us]" not in line:
+            _, cumulative, name = line.split("|")
+            depth = (len(name) - len(name.lstrip())) // 2
+            rows.append((depth, name.strip(), int(cumulative)))
+
+    # The module's own imports are the deeper rows right before it
+    total, imports = 0, []
+    for index, (depth, name, cumulative) in enumerate(rows):
+        if depth == 0 and name == module:
+            total = cumulative
+            for child_depth, child, child_cumulative in reversed(rows[:index]):
+                if child_depth == 0:
+                    break
+                imports.append((child, child_cumulative))
+            break
+
+    return {
+        "module": module,
+        "total_ms": total / 1000,
+        "imports": sorted(imports, key=lambda item: -item[1]),
+        "braintrust": braintrust,
+        "printed": bool(result.stdout.strip()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--modules", nargs="+", default=TOOL_MODULES + ["github_tools"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="slowest imports to list per module")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail above this import time")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<28} {'import ms':>10}  braintrust  prints")
+    reports = []
+    for module in args.modules:
+        report = min((import_once(module) for _ in range(args.runs)), key=lambda r: r["total_ms"])
+        reports.append(report)
+        print(
+            f"{module:<28} {report['total_ms']:>10.1f}  "
+            f"{'yes' if report['braintrust'] else 'no':<10}  {'yes' if report['printed'] else 'no'}"
+        )
+
+        # Handler modules must import without registering or printing anything
+        if module != "github_tools" and (report["braintrust"] or report["printed"]):
+            failures.append(f"{module}: import has side effects")
+        if args.max_ms is not None and report["total_ms"] > args.max_ms:
+            failures.append(f"{module}: {report['total_ms']:.1f} ms > {args.max_ms:.1f} ms")
+
+    for report in reports:
+        print(f"\nslowest imports under {report['module']} (cumulative ms):")
+        for name, cumulative in report["imports"][: args.top]:
+            print(f"  {cumulative / 1000:>8.1f}  {name}")
+
+    if failures:
+        print("\nFAIL:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Content-addressed blob cache for the Braintrust GitHub tools
+
+A git blob's SHA is the hash of its contents, so the contents stored under
+a SHA never change. File contents fetched through `repository-contents` are
+kept here by SHA with no TTL, evicted least recently used once the total
+size passes a bound.
+
+Directory and recursive tree listings record which SHA each path has at a
+ref. When a file is then requested at a ref where its SHA is already known,
+and that blob has been fetched before (at any ref, in any repository), it
+is served without a network call. Path-to-SHA mappings for commit SHAs are
+immutable; for branches and tags they expire with the repository-contents
+TTL, since the ref can move.
+
+When GITHUB_TOOLS_CACHE_PATH is set, blobs are also written to the shared
+SQLite cache (`sqlite_cache.py`) so they survive restarts.
+
+Tuning (environment variables):
+- GITHUB_TOOLS_BLOB_CACHE_MAX_BYTES: in-memory blob bytes kept (default 128MB)
+- GITHUB_TOOLS_BLOB_INDEX_SIZE: path-to-SHA mappings kept (default 100000)
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote
+
+from github_client import GITHUB_API_URL
+from response_cache import TOOL_TTLS
+from sqlite_cache import get_disk_cache
+
+DEFAULT_MAX_BYTES = int(os.getenv("GITHUB_TOOLS_BLOB_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+DEFAULT_INDEX_SIZE = int(os.getenv("GITHUB_TOOLS_BLOB_INDEX_SIZE", "100000"))
+
+# Blobs are immutable, the disk tier only needs a TTL because its schema has one
+DISK_TTL = 365 * 24 * 3600
+
+_COMMIT_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+
+def contents_item(
+    owner: str, repo: str, ref: str | None, path: str, sha: str, size: int | None, type: str
+) -> dict:
+    """A contents API item for a file or directory, with the URLs GitHub would give it"""
+
+    path = path.strip("/")
+    quoted = quote(path)
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{quoted}"
+    if ref:
+        url += f"?ref={quote(ref, safe='')}"
+    # Without a ref, GitHub's web and raw URLs resolve HEAD to the default branch
+    web_ref = quote(ref or "HEAD", safe="/")
+    is_dir = type == "dir"
+    html_url = f"https://github.com/{owner}/{repo}/{'tree' if is_dir else 'blob'}"
+    html_url += f"/{web_ref}/{quoted}"
+    git_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/{'trees' if is_dir else 'blobs'}/{sha}"
+    raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{web_ref}/{quoted}"
+    return {
+        "name": path.rsplit("/", 1)[-1],
+        "path": path,
+        "sha": sha,
+        "size": size or 0,
+        "url": url,
+        "html_url": html_url,
+        "git_url": git_url,
+        "download_url": None if is_dir else raw_url,
+        "type": type,
+        "_links": {"self": url, "git": git_url, "html": html_url},
+    }
+
+
+def blob_sha(data: bytes) -> str:
+    """git's SHA-1 for a blob with these contents"""
+
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class BlobCache:
+    """Thread-safe LRU of blob contents keyed by SHA, bounded by total bytes"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, index_size: int = DEFAULT_INDEX_SIZE):
+        self.max_bytes = max_bytes
+        self.index_size = index_size
+
+        # sha -> bytes, least recently used first
+        self._blobs: OrderedDict = OrderedDict()
+        self._bytes = 0
+        # (owner, repo, ref, path) -> (expires_at, entry)
+        self._index: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, sha: str) -> bytes | None:
+        with self._lock:
+            data = self._blobs.get(sha)
+            if data is not None:
+                self._blobs.move_to_end(sha)
+                self.hits += 1
+                return data
+
+        disk = get_disk_cache()
+        if disk is not None:
+            hit, value, _ = disk.get(f"blob:{sha}")
+            if hit:
+                data = base64.b64decode(value)
+                self._store(sha, data)
+                with self._lock:
+                    self.hits += 1
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, sha: str, data: bytes) -> bool:
+        """Store a blob, refusing contents that don't hash to `sha`"""
+
+        if blob_sha(data) != sha:
+            return False
+        self._store(sha, data)
+
+        disk = get_disk_cache()
+        if disk is not None:
+            disk.set("blob", f"blob:{sha}", base64.b64encode(data).decode(), DISK_TTL)
+        return True
+
+    def _store(self, sha: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            if sha in self._blobs:
+                self._blobs.move_to_end(sha)
+                return
+            self._blobs[sha] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._blobs.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def remember(self, owner: str, repo: str, ref: str | None, entries: list):
+        """Record the SHA of each file in a directory or tree listing at `ref`"""
+
+        ttl = None if ref and _COMMIT_SHA.match(ref) else TOOL_TTLS["repository-contents"]
+        expires_at = float("inf") if ttl is None else time.time() + ttl
+
+        with self._lock:
+            for entry in entries:
+                if entry.get("type") != "file" or not entry.get("sha"):
+                    continue
+                key = (owner.lower(), repo.lower(), ref or "", entry["path"])
+                self._index[key] = (expires_at, entry)
+                self._index.move_to_end(key)
+            while len(self._index) > self.index_size:
+                self._index.popitem(last=False)
+
+    def lookup(self, owner: str, repo: str, ref: str | None, path: str) -> dict | None:
+        """The listing entry last recorded for a file at `ref`, if still valid"""
+
+        key = (owner.lower(), repo.lower(), ref or "", path.strip("/"))
+        with self._lock:
+            found = self._index.get(key)
+            if found is None:
+                return None
+            expires_at, entry = found
+            if expires_at <= time.time():
+                del self._index[key]
+                return None
+            return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "blobs": len(self._blobs),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "indexed_paths": len(self._index),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._blobs.clear()
+            self._index.clear()
+            self._bytes = 0
+
+
+_blob_cache = BlobCache()
+
+
+def get_blob_cache() -> BlobCache:
+    """Return the process-wide blob cache"""
+
+    return _blob_cache
+
+
+async def cached_file_async(owner: str, repo: str, ref: str | None, path: str) -> dict | None:
+    """A contents-API-shaped file response served from the blob cache, or None"""
+
+    cache = get_blob_cache()
+    entry = cache.lookup(owner, repo, ref, path)
+    if entry is None:
+        return None
+
+    # May read from the disk tier
+    data = await asyncio.to_thread(cache.get, entry["sha"])
+    if data is None:
+        return None
+
+    # Built from scratch: the entry may come from a tree listing, shaped differently
+    return {
+        **contents_item(owner, repo, ref, path, entry["sha"], len(data), "file"),
+        "content": base64.b64encode(data).decode(),
+        "encoding": "base64",
+    }
+
+
+async def store_file_async(owner: str, repo: str, ref: str | None, item: dict):
+    """Keep the blob of a fetched contents-API file response"""
+
+    if item.get("type") != "file" or item.get("encoding") != "base64":
+        # Files over GitHub's contents size limit come back without content
+        return
+    try:
+        data = base64.b64decode(item.get("content") or "")
+    except (binascii.Error, ValueError):
+        return
+
+    cache = get_blob_cache()
+    metadata = {key: value for key, value in item.items() if key not in ("content", "encoding")}
+    cache.remember(owner, repo, ref, [metadata])
+    await asyncio.to_thread(cache.put, item["sha"], data)
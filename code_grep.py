@@ -0,0 +1,103 @@
+"""
+Regex matching for the code-search tool, run across a process pool
+
+Matching is CPU-bound, so files are matched in worker processes rather
+than on the event loop. Files are sent to the pool in chunks to amortize
+the cost of handing them to a worker. This module holds only the worker
+side and the pool, so worker processes don't import the tool modules.
+
+Workers are started with forkserver (spawn where that is unavailable),
+not fork: by the time the pool starts, the process runs the event loop
+thread of `sync_handler`, and forking a threaded process can deadlock.
+As with spawn, a script that calls code-search directly needs an
+`if __name__ == "__main__":` guard, since workers re-import the main module.
+
+Tuning (environment variables):
+- GITHUB_TOOLS_GREP_WORKERS: worker processes (default: CPU count, 0 to
+  match in-process)
+"""
+
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_WORKERS = int(os.getenv("GITHUB_TOOLS_GREP_WORKERS", str(os.cpu_count() or 1)))
+
+# Longest line returned in a hit, longer lines are cut
+MAX_LINE_CHARS = 500
+
+
+def _line(text: str) -> str:
+    return text if len(text) <= MAX_LINE_CHARS else text[:MAX_LINE_CHARS] + "..."
+
+
+def grep_text(regex: re.Pattern, path: str, text: str, context: int, limit: int) -> list:
+    """Up to `limit` hits in one file, one per matching line"""
+
+    hits = []
+    lines = None
+    last_line = -1
+    line_number = 0
+    position = 0
+
+    for match in regex.finditer(text):
+        # Count newlines incrementally instead of splitting every file
+        line_number += text.count("\n", position, match.start())
+        position = match.start()
+        if line_number == last_line:
+            continue
+        last_line = line_number
+
+        if lines is None:
+            # Split only where newlines are counted; splitlines() also breaks on
+            # form feeds, bare CRs and other separators, shifting every later line
+            lines = [line[:-1] if line.endswith("\r") else line for line in text.split("\n")]
+            if text.endswith("\n"):
+                lines.pop()
+        hits.append(
+            {
+                "path": path,
+                "line": line_number + 1,
+                "text": _line(lines[line_number] if line_number < len(lines) else ""),
+                "before": [_line(l) for l in lines[max(0, line_number - context) : line_number]],
+                "after": [_line(l) for l in lines[line_number + 1 : line_number + 1 + context]],
+            }
+        )
+        if len(hits) >= limit:
+            break
+    return hits
+
+
+def grep_chunk(pattern: str, flags: int, files: list, context: int, limit: int) -> list:
+    """Match a chunk of (path, text) pairs, stopping at `limit` hits"""
+
+    regex = re.compile(pattern, flags)
+    hits = []
+    for path, text in files:
+        hits.extend(grep_text(regex, path, text, context, limit - len(hits)))
+        if len(hits) >= limit:
+            break
+    return hits
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor | None:
+    """The shared worker pool, or None when matching runs in-process"""
+
+    global _pool
+    if DEFAULT_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context(
+                    "forkserver" if "forkserver" in methods else "spawn"
+                )
+                _pool = ProcessPoolExecutor(max_workers=DEFAULT_WORKERS, mp_context=context)
+    return _pool
@@ -0,0 +1,241 @@
+"""
+GitHub Code Search Tool for Braintrust
+
+This tool greps a repository's code with a regular expression at any ref.
+Unlike GitHub's code search it needs no index, matches full regexes and
+searches any branch, tag or commit.
+"""
+
+import asyncio
+import os
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from blob_cache import get_blob_cache
+from code_grep import DEFAULT_WORKERS, get_pool, grep_chunk
+from git_trees import filter_entries, list_tree_async
+from github_client import DeadlineExceeded, PAGE_CONCURRENCY, gather_limited, sync_handler
+from rate_limit import RateLimitExceeded
+from raw_contents import read_raw_async
+from response_cache import cached
+from snapshots import get_snapshot_store
+from tool_registry import lazy_tool
+
+MAX_HITS = 1000
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+
+# Files fetched, then matched, per round; the hit budget is checked between rounds
+BATCH_SIZE = 64
+
+# Each file fetched on its own costs a core API request, larger searches use a snapshot
+SNAPSHOT_ABOVE = int(os.getenv("GITHUB_TOOLS_CODE_SEARCH_SNAPSHOT_FILES", "200"))
+
+
+class CodeSearchParams(BaseModel):
+    owner: str
+    repo: str
+    pattern: str  # Python regular expression
+    ref: Optional[str] = None  # Branch, tag, or commit SHA
+    path: Optional[str] = ""  # only search under this directory
+    include: Optional[str] = None  # glob on the full path, e.g. "*.py"
+    ignore_case: Optional[bool] = False
+    context_lines: Optional[int] = 2  # lines before and after each hit
+    max_hits: Optional[int] = 100  # stop searching after this many hits (max 1000)
+    max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE  # skip larger files
+    snapshot: Optional[bool] = None  # download the repo once; default: above 200 files
+
+
+class CodeSearchHit(BaseModel):
+    path: str
+    line: int
+    text: str
+    before: List[str]
+    after: List[str]
+
+
+class CodeSearchResponse(BaseModel):
+    repository: str
+    ref: Optional[str]
+    pattern: str
+    hits: List[CodeSearchHit]
+    files_searched: int
+    files_matched: int
+    files_skipped: int
+    files_failed: int
+    truncated: bool
+
+
+async def _load(owner, repo, ref, path, local, max_file_size) -> str | Exception | None:
+    """A file's text, None for binary or oversized files, or the error that stopped it loading"""
+
+    try:
+        if local is not None:
+            data = bytes(local.read(path))
+            if b"\0" in data:
+                return None
+            return data.decode("utf-8", errors="replace")
+
+        result = await read_raw_async(owner, repo, path, ref=ref, max_bytes=max_file_size)
+        if result["encoding"] != "utf-8" or result["truncated"]:
+            return None
+        return result["content"]
+    except Exception as e:
+        # Reported as failed, not skipped: the file may well contain hits
+        return e
+
+
+async def _match(pattern: str, flags: int, files: list, context: int, limit: int) -> list:
+    """Match files across the process pool, hits in file order"""
+
+    pool = get_pool()
+    if pool is None or len(files) < 2:
+        return grep_chunk(pattern, flags, files, context, limit)
+
+    # Contiguous chunks keep the hits in path order when concatenated
+    size = -(-len(files) // DEFAULT_WORKERS)
+    chunks = [files[i : i + size] for i in range(0, len(files), size)]
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, grep_chunk, pattern, flags, chunk, context, limit)
+            for chunk in chunks
+        )
+    )
+    return [hit for result in results for hit in result]
+
+
+# Searches with failed files are partial, the next call should retry them
+@cached("code-search", cache_if=lambda result: not result["files_failed"])
+async def code_search_handler_async(
+    owner: str,
+    repo: str,
+    pattern: str,
+    ref: str | None = None,
+    path: str = "",
+    include: str | None = None,
+    ignore_case: bool = False,
+    context_lines: int = 2,
+    max_hits: int = 100,
+    max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+    snapshot: bool | None = None,
+):
+    """Search a repository's files for a regular expression"""
+
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    try:
+        re.compile(pattern, flags)
+    except re.error as e:
+        raise Exception(f"Invalid pattern: {e}")
+    max_hits = max(1, min(max_hits, MAX_HITS))
+    context_lines = max(0, context_lines)
+
+    # Read from a snapshot when asked to, or when this commit was already downloaded
+    store = get_snapshot_store()
+    local = await store.get(owner, repo, ref, create=bool(snapshot))
+    if local is not None:
+        entries = local.tree()
+    else:
+        entries, _ = await list_tree_async(owner, repo, ref=ref, path=path)
+        get_blob_cache().remember(owner, repo, ref, entries)
+
+    files = [
+        entry
+        for entry in filter_entries(entries, path=path, pattern=include)
+        if entry["type"] == "file"
+    ]
+    searchable = [entry for entry in files if (entry["size"] or 0) <= max_file_size]
+    if local is None and snapshot is None and len(searchable) > SNAPSHOT_ABOVE:
+        # One tarball download instead of a request per file
+        local = await store.get(owner, repo, ref, create=True)
+    batches = [searchable[i : i + BATCH_SIZE] for i in range(0, len(searchable), BATCH_SIZE)]
+
+    def load(batch):
+        return asyncio.ensure_future(
+            gather_limited(
+                (_load(owner, repo, ref, e["path"], local, max_file_size) for e in batch),
+                PAGE_CONCURRENCY,
+            )
+        )
+
+    hits = []
+    searched = 0
+    skipped = len(files) - len(searchable)
+    failed = 0
+    truncated = False
+    # Fetch the next batch while the current one is being matched
+    pending = load(batches[0]) if batches else None
+    for index, batch in enumerate(batches):
+        texts = await pending
+        pending = load(batches[index + 1]) if index + 1 < len(batches) else None
+
+        loaded = [(entry["path"], text) for entry, text in zip(batch, texts) if isinstance(text, str)]
+        errors = [text for text in texts if isinstance(text, Exception)]
+        searched += len(loaded)
+        failed += len(errors)
+        skipped += len(batch) - len(loaded) - len(errors)
+        hits.extend(await _match(pattern, flags, loaded, context_lines, max_hits - len(hits)))
+
+        if errors:
+            truncated = True
+        # Out of rate limit budget or time, the remaining files would fail too
+        out_of_budget = any(isinstance(e, (RateLimitExceeded, DeadlineExceeded)) for e in errors)
+        if len(hits) >= max_hits or out_of_budget:
+            if len(hits) >= max_hits:
+                hits = hits[:max_hits]
+            truncated = True
+            if pending is not None:
+                pending.cancel()
+            break
+
+    return {
+        "repository": f"{owner}/{repo}",
+        "ref": ref,
+        "pattern": pattern,
+        "hits": hits,
+        "files_searched": searched,
+        "files_matched": len({hit["path"] for hit in hits}),
+        "files_skipped": skipped,
+        "files_failed": failed,
+        "truncated": truncated,
+    }
+
+
+code_search_handler = sync_handler(code_search_handler_async)
+
+TOOL = {
+    "name": "Search Repository Code",
+    "slug": "code-search",
+    "description": """
+    Search the files of one repository for a regular expression, like grep.
+
+    Use this tool instead of reading files one by one with
+    repository-contents when looking for where something is defined or used.
+
+    Parameters:
+    - pattern: Python regular expression, e.g. "def \\w+_handler" or "TODO|FIXME"
+    - ref: branch, tag, or commit (defaults to the default branch)
+    - path: only search under this directory
+    - include: glob on the full path, e.g. "*.py" or "docs/*.md"
+    - ignore_case: case-insensitive matching
+    - context_lines: lines of context before and after each hit (default 2)
+    - max_hits: stop once this many hits are found (default 100, max 1000)
+    - max_file_size: skip files larger than this many bytes (default 1 MB)
+    - snapshot: download the whole repository once instead of fetching
+      files individually. By default this happens when more than 200
+      files are to be searched; false always fetches files one by one,
+      at one API request each
+
+    Returns file/line hits in path order with surrounding lines.
+    Binary files are skipped. "files_failed" counts files that could not
+    be fetched (e.g. rate limit or deadline reached). "truncated" is true
+    when the search stopped at max_hits or some files were not searched
+    because they failed; a search that is not truncated found every hit.
+    """,
+    "handler": code_search_handler,
+    "parameters": CodeSearchParams,
+}
+
+# Registered with Braintrust on first access to `code_search`, see tool_registry.py
+__getattr__ = lazy_tool("code_search", TOOL)
@@ -0,0 +1,170 @@
+"""
+Recursive git tree listing for the Braintrust GitHub tools
+
+The contents API returns one directory level per request. The git trees
+API (`git/trees/{sha}?recursive=1`) returns a whole repository tree in one
+response, so exploring a repo's structure costs a single call.
+
+GitHub caps recursive responses (about 100,000 entries / 7 MB) and sets
+`truncated: true` when it cuts one short. In that case the tree is listed
+one level down and each subtree is fetched recursively in parallel,
+splitting again wherever a subtree is itself truncated.
+"""
+
+import fnmatch
+from urllib.parse import quote
+
+from github_client import GITHUB_API_URL, PAGE_CONCURRENCY, gather_limited, github_get_async
+
+# git tree entry types, named like the contents API's
+ENTRY_TYPES = {"blob": "file", "tree": "dir", "commit": "submodule"}
+
+# Largest files listed in a summary
+SUMMARY_LARGEST = 10
+
+
+def _entry(raw: dict, prefix: str) -> dict:
+    path = f"{prefix}/{raw['path']}" if prefix else raw["path"]
+    return {
+        "path": path,
+        "type": ENTRY_TYPES.get(raw["type"], raw["type"]),
+        "sha": raw["sha"],
+        "size": raw.get("size"),
+        "mode": raw["mode"],
+    }
+
+
+def depth_of(path: str, base: str = "") -> int:
+    """Depth of `path` below `base`, 1 for its direct children"""
+
+    if base:
+        path = path[len(base) :].lstrip("/")
+    return path.count("/") + 1
+
+
+async def get_tree_async(owner: str, repo: str, sha: str, recursive: bool = True) -> dict:
+    """Fetch one git tree, `sha` may also be a branch, tag or "HEAD" """
+
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/trees/{quote(sha, safe='')}"
+    params = {"recursive": "1"} if recursive else None
+    return await github_get_async(url, params=params)
+
+
+def _wanted(entry_path: str, base: str, max_depth: int | None) -> bool:
+    """Whether a subtree can hold entries under `base` within `max_depth`"""
+
+    if base and (base == entry_path or base.startswith(entry_path + "/")):
+        # On the way down to `base`
+        return True
+    if base and not entry_path.startswith(base + "/"):
+        return False
+    return max_depth is None or depth_of(entry_path, base) < max_depth
+
+
+async def _walk(
+    owner: str,
+    repo: str,
+    sha: str,
+    prefix: str,
+    base: str,
+    max_depth: int | None,
+    stats: dict,
+) -> list:
+    tree = await get_tree_async(owner, repo, sha, recursive=True)
+    stats["requests"] += 1
+    if not tree.get("truncated"):
+        return [_entry(raw, prefix) for raw in tree["tree"]]
+
+    # Too large for one response: list this level, then each subtree in parallel
+    stats["split"] += 1
+    level = await get_tree_async(owner, repo, sha, recursive=False)
+    stats["requests"] += 1
+    entries = [_entry(raw, prefix) for raw in level["tree"]]
+
+    # Only descend where entries under `base` within `max_depth` can be
+    subtrees = [
+        entry
+        for entry in entries
+        if entry["type"] == "dir" and _wanted(entry["path"], base, max_depth)
+    ]
+    nested = await gather_limited(
+        (
+            _walk(owner, repo, entry["sha"], entry["path"], base, max_depth, stats)
+            for entry in subtrees
+        ),
+        PAGE_CONCURRENCY,
+    )
+    for subtree_entries in nested:
+        entries.extend(subtree_entries)
+    return entries
+
+
+async def list_tree_async(
+    owner: str,
+    repo: str,
+    ref: str | None = None,
+    path: str = "",
+    max_depth: int | None = None,
+) -> tuple[list, dict]:
+    """Entries of a repository tree, as (entries, fetch stats).
+
+    Entries carry repository-relative paths and are sorted by path. `path`
+    and `max_depth` only limit which subtrees are fetched when a truncated
+    tree has to be split, use `filter_entries` to apply them.
+    """
+
+    stats = {"requests": 0, "split": 0}
+    base = path.strip("/")
+    entries = await _walk(owner, repo, ref or "HEAD", "", base, max_depth, stats)
+    entries.sort(key=lambda entry: entry["path"])
+    return entries, stats
+
+
+def filter_entries(
+    entries: list,
+    path: str = "",
+    pattern: str | None = None,
+    max_depth: int | None = None,
+) -> list:
+    """Keep entries under `path`, matching a glob and at most `max_depth` levels deep"""
+
+    base = path.strip("/")
+    selected = []
+    for entry in entries:
+        entry_path = entry["path"]
+        if base and not entry_path.startswith(base + "/"):
+            continue
+        if max_depth is not None and depth_of(entry_path, base) > max_depth:
+            continue
+        if pattern and not fnmatch.fnmatchcase(entry_path, pattern):
+            continue
+        selected.append(entry)
+    return selected
+
+
+def summarize(entries: list) -> dict:
+    """File/directory counts and sizes for a list of tree entries"""
+
+    files = [entry for entry in entries if entry["type"] == "file"]
+    by_extension: dict = {}
+    for entry in files:
+        name = entry["path"].rsplit("/", 1)[-1]
+        extension = name.rsplit(".", 1)[-1].lower() if "." in name.lstrip(".") else ""
+        totals = by_extension.setdefault(extension, {"files": 0, "size": 0})
+        totals["files"] += 1
+        totals["size"] += entry["size"] or 0
+
+    largest = sorted(files, key=lambda entry: entry["size"] or 0, reverse=True)
+    return {
+        "files": len(files),
+        "directories": sum(1 for entry in entries if entry["type"] == "dir"),
+        "submodules": sum(1 for entry in entries if entry["type"] == "submodule"),
+        "total_size": sum(entry["size"] or 0 for entry in files),
+        "by_extension": dict(
+            sorted(by_extension.items(), key=lambda item: item[1]["size"], reverse=True)
+        ),
+        "largest_files": [
+            {"path": entry["path"], "size": entry["size"]}
+            for entry in largest[:SUMMARY_LARGEST]
+        ],
+    }
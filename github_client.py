@@ -0,0 +1,827 @@
+"""
+Shared GitHub HTTP client for the Braintrust GitHub tools
+
+All tool handlers go through this module instead of making HTTP requests
+directly. Requests are made with a keep-alive `httpx.AsyncClient`, so
+repeat requests to api.github.com skip the TCP+TLS handshake and one event
+loop can drive many concurrent calls.
+
+Every handler has a native async variant (`*_handler_async`); the sync
+handlers are thin wrappers that run it with `run_sync`. Sync callers share
+a single background event loop, and with it a single connection pool.
+
+Responses carrying an ETag or Last-Modified header are remembered per
+(url, params). Repeat requests are sent as conditional requests and a
+304 Not Modified is answered from the stored body; GitHub does not count
+304s against the rate limit.
+
+List endpoints can be walked with `iter_pages_async`/`iter_items_async`,
+which follow the `Link: rel="next"` header and stop as soon as the caller
+has enough. When the first page advertises `rel="last"`,
+`fetch_items_async` instead fetches the remaining pages concurrently and
+reassembles them in order.
+
+Concurrent identical GETs are coalesced into one request whose response
+(or error) goes to every caller, so many sessions asking for the same
+repository at once, e.g. right after its cache entry expires, cost one
+request.
+
+`github_stream_async` opens a raw media type response whose body the
+caller reads incrementally, for files too large to buffer whole.
+
+Each call can carry a deadline (`with_deadline`, or `deadline=` on any
+sync handler). It is kept in a context variable, so it covers every request
+the call makes, across retries, rate limit waits and pagination, including
+pages fetched concurrently. Requests use separate connect and read timeouts,
+both capped by the time left. Idempotent GETs that opt in with `hedge=True`
+send a duplicate request when the first one is slower than the recent p95
+latency for its resource, and use whichever answers first.
+
+Every request is paced by the rate limit scheduler in `rate_limit.py` and
+retried when GitHub answers with a primary or secondary rate limit. Auth is
+added per request from the token pool in `token_pool.py`, which picks the
+configured token with the most remaining budget.
+
+Tuning (environment variables):
+- GITHUB_TOOLS_MAX_CONNECTIONS: concurrent connections per client (default 100)
+- GITHUB_TOOLS_POOL_MAXSIZE: idle keep-alive connections kept (default 16)
+- GITHUB_TOOLS_TIMEOUT: default read timeout in seconds (default 30)
+- GITHUB_TOOLS_CONNECT_TIMEOUT: connect timeout in seconds (default 5)
+- GITHUB_TOOLS_DEADLINE: default deadline in seconds for sync handler calls
+  (default 0, no deadline)
+- GITHUB_TOOLS_HEDGE: set to 0 to never send hedged requests (default 1)
+- GITHUB_TOOLS_HEDGE_MIN_DELAY: shortest wait before hedging, in seconds
+  (default 0.05)
+- GITHUB_TOOLS_ETAG_CACHE_SIZE: conditional-request entries kept (default 512)
+- GITHUB_TOOLS_ETAG_CACHE_MAX_BYTES: response bytes kept for conditional
+  requests (default 64MB)
+- GITHUB_TOOLS_PAGE_CONCURRENCY: pages fetched in parallel (default 8)
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, AsyncIterator, Callable
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+from rate_limit import MAX_RETRIES, MAX_WAIT, RateLimitExceeded, get_scheduler, resource_for_url
+from token_pool import get_token_pool, token_id
+
+if TYPE_CHECKING:
+    # Imported on first request instead, so importing a tool stays cheap
+    import httpx
+
+GITHUB_API_URL = "https://api.github.com"
+RAW_MEDIA_TYPE = "application/vnd.github.raw+json"
+
+DEFAULT_MAX_CONNECTIONS = int(os.getenv("GITHUB_TOOLS_MAX_CONNECTIONS", "100"))
+DEFAULT_POOL_MAXSIZE = int(os.getenv("GITHUB_TOOLS_POOL_MAXSIZE", "16"))
+DEFAULT_TIMEOUT = float(os.getenv("GITHUB_TOOLS_TIMEOUT", "30"))
+CONNECT_TIMEOUT = float(os.getenv("GITHUB_TOOLS_CONNECT_TIMEOUT", "5"))
+DEFAULT_DEADLINE = float(os.getenv("GITHUB_TOOLS_DEADLINE", "0")) or None
+HEDGE_ENABLED = os.getenv("GITHUB_TOOLS_HEDGE", "1") != "0"
+HEDGE_MIN_DELAY = float(os.getenv("GITHUB_TOOLS_HEDGE_MIN_DELAY", "0.05"))
+MAX_PER_PAGE = 100
+PAGE_CONCURRENCY = int(os.getenv("GITHUB_TOOLS_PAGE_CONCURRENCY", "8"))
+ETAG_CACHE_SIZE = int(os.getenv("GITHUB_TOOLS_ETAG_CACHE_SIZE", "512"))
+ETAG_CACHE_MAX_BYTES = int(os.getenv("GITHUB_TOOLS_ETAG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# An AsyncClient's pool is bound to the loop that created it, keep one per loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Absolute time.monotonic() by which the current call must finish
+_deadline: contextvars.ContextVar = contextvars.ContextVar("github_deadline", default=None)
+
+# Recent GET latencies per resource, the hedge delay is their p95
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+# Don't spend the last of a budget on duplicates
+HEDGE_MIN_REMAINING = 50
+_latencies: dict[str, deque] = {}
+_hedge_stats = {"sent": 0, "won": 0}
+
+# (loop, url, params) -> [task, waiters] for GETs in flight, see github_fetch_async
+_in_flight: dict[tuple, list] = {}
+_single_flight_stats = {"requests": 0, "coalesced": 0}
+
+# Background loop that runs coroutines on behalf of sync callers
+_sync_loop = None
+_sync_loop_lock = threading.Lock()
+
+# (url, params) -> {"etag", "last_modified", "body", "links", "size"}, oldest first
+_conditional_cache: OrderedDict = OrderedDict()
+_conditional_lock = threading.Lock()
+# Response bytes behind the stored bodies, bounded by ETAG_CACHE_MAX_BYTES
+_conditional_bytes = 0
+
+
+def create_client(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> "httpx.AsyncClient":
+    """Create a keep-alive async client with a sized connection pool"""
+
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=max_connections, max_keepalive_connections=pool_maxsize
+    )
+    timeouts = httpx.Timeout(timeout, connect=min(CONNECT_TIMEOUT, timeout))
+    return httpx.AsyncClient(limits=limits, timeout=timeouts)
+
+
+def get_async_client() -> "httpx.AsyncClient":
+    """Return the shared client for the running event loop, creating it on first use"""
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = create_client()
+        _clients[loop] = client
+    return client
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    if _sync_loop is None:
+        with _sync_loop_lock:
+            if _sync_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="github-tools-loop", daemon=True
+                ).start()
+                _sync_loop = loop
+    return _sync_loop
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    Coroutines run on a shared background event loop so every sync caller,
+    from any thread, reuses the same connection pool.
+    """
+
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
+
+
+class DeadlineExceeded(Exception):
+    """A call ran out of time before GitHub answered"""
+
+
+def time_left() -> float | None:
+    """Seconds until the current call's deadline, or None without one"""
+
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _check_deadline(needed: float = 0.0):
+    remaining = time_left()
+    if remaining is not None and remaining <= needed:
+        raise DeadlineExceeded("GitHub request deadline exceeded")
+
+
+async def with_deadline(coro, seconds: float | None):
+    """Await `coro`, giving it and every request it makes at most `seconds`.
+
+    Nested deadlines keep the earlier one. Raises DeadlineExceeded when
+    time runs out.
+    """
+
+    if not seconds or seconds <= 0:
+        return await coro
+
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+
+    token = _deadline.set(deadline)
+    try:
+        # The task wait_for runs the coroutine in copies this context
+        return await asyncio.wait_for(coro, max(deadline - time.monotonic(), 0))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"GitHub call did not finish within {seconds:g}s")
+    finally:
+        _deadline.reset(token)
+
+
+def sync_handler(async_handler):
+    """Build the sync handler for an async one, keeping its signature.
+
+    The sync handler also takes `deadline`, in seconds, for the whole call.
+    """
+
+    @functools.wraps(async_handler)
+    def wrapper(*args, deadline: float | None = DEFAULT_DEADLINE, **kwargs):
+        return run_sync(with_deadline(async_handler(*args, **kwargs), deadline))
+
+    return wrapper
+
+
+def build_headers(accept: str = "application/vnd.github.v3+json") -> dict:
+    """Build request headers; auth is added per request by `send_async`"""
+
+    return {
+        "Accept": accept,
+        "User-Agent": "Braintrust-GitHub-Tools",
+    }
+
+
+def _conditional_key(url: str, params: dict | None) -> tuple:
+    return (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+
+def _get_validators(key: tuple) -> dict | None:
+    with _conditional_lock:
+        entry = _conditional_cache.get(key)
+        if entry is not None:
+            _conditional_cache.move_to_end(key)
+        return entry
+
+
+def _store_validators(key: tuple, response: "httpx.Response", body):
+    global _conditional_bytes
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        return
+    # The parsed body takes more memory than this, but grows with it
+    size = len(response.content)
+
+    with _conditional_lock:
+        previous = _conditional_cache.pop(key, None)
+        if previous is not None:
+            _conditional_bytes -= previous["size"]
+        if size > ETAG_CACHE_MAX_BYTES:
+            return
+        _conditional_cache[key] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+            "links": response.links,
+            "size": size,
+        }
+        _conditional_bytes += size
+        while (
+            len(_conditional_cache) > ETAG_CACHE_SIZE
+            or _conditional_bytes > ETAG_CACHE_MAX_BYTES
+        ):
+            _, evicted = _conditional_cache.popitem(last=False)
+            _conditional_bytes -= evicted["size"]
+
+
+def clear_conditional_cache():
+    """Forget all stored ETag/Last-Modified validators and bodies"""
+
+    global _conditional_bytes
+
+    with _conditional_lock:
+        _conditional_cache.clear()
+        _conditional_bytes = 0
+
+
+class GitHubHTTPError(Exception):
+    """A GitHub error response, keeping its status code for callers that branch on it"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _timeouts(timeout: float | None) -> "httpx.Timeout":
+    """Connect and read timeouts for one request, capped by the time left"""
+
+    import httpx
+
+    read = timeout or DEFAULT_TIMEOUT
+    connect = min(CONNECT_TIMEOUT, read)
+    remaining = time_left()
+    if remaining is not None:
+        read, connect = min(read, remaining), min(connect, remaining)
+    return httpx.Timeout(read, connect=connect)
+
+
+def _record_latency(resource: str, seconds: float):
+    samples = _latencies.get(resource)
+    if samples is None:
+        samples = _latencies[resource] = deque(maxlen=LATENCY_WINDOW)
+    samples.append(seconds)
+
+
+def hedge_delay(resource: str) -> float | None:
+    """Seconds to wait before hedging a GET on `resource`, None until enough are timed"""
+
+    samples = _latencies.get(resource)
+    if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    ordered = sorted(samples)
+    p95 = ordered[min(int(len(ordered) * HEDGE_PERCENTILE), len(ordered) - 1)]
+    return max(p95, HEDGE_MIN_DELAY)
+
+
+def get_hedge_stats() -> dict:
+    """Hedged requests sent and how many answered before the original"""
+
+    return {
+        **_hedge_stats,
+        "delays": {resource: hedge_delay(resource) for resource in _latencies},
+    }
+
+
+async def _send_once(method: str, url: str, token: str | None, base_headers: dict, **kwargs):
+    headers = dict(base_headers)
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    stream = kwargs.pop("stream")
+    follow_redirects = kwargs.pop("follow_redirects")
+    timeouts = _timeouts(kwargs.pop("timeout", None))
+
+    client = get_async_client()
+    if stream:
+        request = client.build_request(method, url, headers=headers, timeout=timeouts, **kwargs)
+        send = client.send(request, stream=True, follow_redirects=follow_redirects)
+    else:
+        send = client.request(
+            method,
+            url,
+            headers=headers,
+            timeout=timeouts,
+            follow_redirects=follow_redirects,
+            **kwargs,
+        )
+
+    # The read timeout applies per read, this bounds the whole request
+    remaining = time_left()
+    started = time.monotonic()
+    try:
+        response = await (send if remaining is None else asyncio.wait_for(send, remaining))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("GitHub request deadline exceeded")
+
+    if method == "GET" and not stream:
+        _record_latency(resource_for_url(url), time.monotonic() - started)
+    return response
+
+
+async def _send_hedged(send: Callable, resource: str, token: str | None):
+    """Send, and send again with a fresh token if no answer comes within the p95.
+
+    Returns (response, token used) from whichever request succeeds first.
+    """
+
+    delay = hedge_delay(resource)
+    first = asyncio.ensure_future(send(token))
+    tokens = {first: token}
+    try:
+        if delay is None:
+            return await first, token
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result(), token
+
+        # Only hedge with a budget that can spare the request right now
+        scheduler = get_scheduler()
+        backup = get_token_pool().choose(resource)
+        remaining, blocked_for = scheduler.availability(resource, token_id(backup))
+        if blocked_for > 0 or remaining <= HEDGE_MIN_REMAINING:
+            return await first, token
+        try:
+            wait = scheduler.reserve(resource, token_id(backup))
+        except RateLimitExceeded:
+            return await first, token
+        if wait >= (time_left() or math.inf):
+            return await first, token
+
+        async def send_backup():
+            # Paced like any other request; the original may still answer first
+            if wait > 0:
+                await asyncio.sleep(wait)
+            return await send(backup)
+
+        second = asyncio.ensure_future(send_backup())
+        tokens[second] = backup
+        _hedge_stats["sent"] += 1
+
+        pending = {first, second}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        _hedge_stats["won"] += 1
+                    return task.result(), tokens[task]
+        # Both failed, report the original request's error
+        return first.result(), token
+    finally:
+        for task in tokens:
+            task.cancel()
+
+
+async def send_async(method: str, url: str, **kwargs) -> "httpx.Response":
+    """Send a request on the shared client under the rate limit scheduler.
+
+    Picks the least-loaded token from the pool, waits for that token's
+    bucket on the request's resource, records the returned X-RateLimit-*
+    headers, and retries 403/429 rate limit responses. A retry may go out
+    with a different token.
+
+    Every attempt and every wait is bounded by the current deadline, see
+    `with_deadline`. With `hedge=True` a GET is hedged, see `_send_hedged`.
+
+    With `stream=True` the body is not read up front; the caller must
+    close the returned response.
+    """
+
+    scheduler = get_scheduler()
+    pool = get_token_pool()
+    resource = resource_for_url(url)
+    base_headers = kwargs.pop("headers", None) or build_headers()
+    hedge = kwargs.pop("hedge", False) and HEDGE_ENABLED and method == "GET"
+    kwargs.setdefault("stream", False)
+    kwargs.setdefault("follow_redirects", False)
+    hedge = hedge and not kwargs["stream"]
+    send = functools.partial(_send_once, method, url, base_headers=base_headers, **kwargs)
+
+    for attempt in range(MAX_RETRIES + 1):
+        _check_deadline()
+        token = pool.choose(resource)
+        tid = token_id(token)
+
+        wait = scheduler.reserve(resource, tid)
+        if wait > 0:
+            _check_deadline(wait)
+            await asyncio.sleep(wait)
+
+        if hedge:
+            response, token = await _send_hedged(send, resource, token)
+            tid = token_id(token)
+        else:
+            response = await send(token)
+        scheduler.observe(resource, response.headers, tid)
+        pool.record(token, response.status_code)
+
+        if response.status_code not in (401, 403, 429) or attempt == MAX_RETRIES:
+            return response
+
+        if kwargs["stream"]:
+            # Error bodies are small, read them so the retry logic can inspect them
+            await response.aread()
+
+        # A rejected token is quarantined by the pool, try the next one
+        if response.status_code == 401:
+            if len(pool.tokens) <= 1:
+                return response
+            continue
+
+        delay = scheduler.retry_delay(
+            resource, response.status_code, response.headers, response.text, attempt, tid
+        )
+        if delay is None:
+            return response
+        # Another token may be usable right away; with one token, don't wait forever
+        if delay > MAX_WAIT and len(pool.tokens) <= 1:
+            return response
+        # Nor past the deadline
+        remaining = time_left()
+        if remaining is not None and delay >= remaining and len(pool.tokens) <= 1:
+            return response
+        # The next reserve() waits out the delay recorded by retry_delay
+
+    return response
+
+
+async def github_fetch_async(
+    url: str, params: dict | None = None, timeout: float | None = None, hedge: bool = False
+):
+    """GET a GitHub API URL on the shared client.
+
+    Returns a tuple of (parsed JSON, parsed Link header) where the links
+    are keyed by rel, e.g. links["next"]["url"]. `hedge` sends a duplicate
+    request if the first one is slow, see `send_async`.
+
+    Identical GETs (same URL and params) already in flight on this event
+    loop are not sent again: every caller waits on the one request and gets
+    its response, or its error. The shared request is cancelled once no
+    caller is waiting for it.
+    """
+
+    loop = asyncio.get_running_loop()
+    key = (loop, *_conditional_key(url, params))
+    flight = _in_flight.get(key)
+    if flight is None:
+        # Outside the first caller's context, so its deadline doesn't fail the
+        # other waiters; each waiter's own deadline still applies below
+        task = loop.create_task(
+            _fetch_async(url, params, timeout, hedge), context=contextvars.Context()
+        )
+        flight = _in_flight[key] = [task, 0]
+        task.add_done_callback(lambda _: _land(key, flight))
+        _single_flight_stats["requests"] += 1
+    else:
+        _single_flight_stats["coalesced"] += 1
+
+    task = flight[0]
+    flight[1] += 1
+    try:
+        return await asyncio.shield(task)
+    finally:
+        flight[1] -= 1
+        if flight[1] == 0 and not task.done():
+            # Later callers must not join a cancelled request
+            _land(key, flight)
+            task.cancel()
+
+
+def _land(key: tuple, flight: list):
+    if _in_flight.get(key) is flight:
+        del _in_flight[key]
+
+
+def get_single_flight_stats() -> dict:
+    """GETs sent, GETs that joined one already in flight, and GETs in flight now"""
+
+    return {**_single_flight_stats, "in_flight": len(_in_flight)}
+
+
+async def _fetch_async(url: str, params: dict | None, timeout: float | None, hedge: bool):
+    import httpx
+
+    headers = build_headers()
+
+    # Revalidate a previously seen response instead of refetching it
+    key = _conditional_key(url, params)
+    cached = _get_validators(key)
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        response = await send_async(
+            "GET",
+            url,
+            headers=headers,
+            params=params,
+            timeout=timeout or DEFAULT_TIMEOUT,
+            hedge=hedge,
+        )
+
+        if response.status_code == 304 and cached:
+            return cached["body"], cached["links"]
+
+        response.raise_for_status()
+        body = response.json()
+        _store_validators(key, response, body)
+
+        return body, response.links
+
+    except httpx.HTTPError as e:
+        raise Exception(f"GitHub API request failed: {str(e)}")
+    except KeyError as e:
+        raise Exception(f"Unexpected response format: {str(e)}")
+
+
+async def github_get_async(
+    url: str, params: dict | None = None, timeout: float | None = None, hedge: bool = False
+):
+    """GET a GitHub API URL on the shared client and return the parsed JSON"""
+
+    return (await github_fetch_async(url, params=params, timeout=timeout, hedge=hedge))[0]
+
+
+def github_get(
+    url: str,
+    params: dict | None = None,
+    timeout: float | None = None,
+    hedge: bool = False,
+    deadline: float | None = DEFAULT_DEADLINE,
+):
+    """Synchronous `github_get_async`"""
+
+    return run_sync(
+        with_deadline(github_get_async(url, params=params, timeout=timeout, hedge=hedge), deadline)
+    )
+
+
+async def github_graphql_async(
+    query: str, variables: dict | None = None, timeout: float | None = None
+) -> dict:
+    """POST a query to the GitHub GraphQL API and return its `data`"""
+
+    import httpx
+
+    if not get_token_pool():
+        raise Exception("GitHub GraphQL API requires GITHUB_TOKEN to be set")
+
+    try:
+        response = await send_async(
+            "POST",
+            f"{GITHUB_API_URL}/graphql",
+            headers=build_headers(),
+            json={"query": query, "variables": variables or {}},
+            timeout=timeout or DEFAULT_TIMEOUT,
+        )
+        response.raise_for_status()
+        payload = response.json()
+
+    except httpx.HTTPError as e:
+        raise Exception(f"GitHub API request failed: {str(e)}")
+
+    # Partial failures (e.g. one missing repo) still return the rest of `data`
+    if payload.get("data") is None:
+        messages = "; ".join(error.get("message", "") for error in payload.get("errors", []))
+        raise Exception(f"GitHub GraphQL request failed: {messages}")
+
+    return payload["data"]
+
+
+async def github_stream_async(
+    url: str,
+    params: dict | None = None,
+    start: int = 0,
+    timeout: float | None = None,
+) -> "httpx.Response":
+    """Open a raw media type GET whose body is read incrementally.
+
+    Asks for the body from byte `start` with a Range header. Servers that
+    ignore it answer 200 with the whole body, so check for 206 before
+    assuming the body starts at `start`. The caller must close the response.
+    Raises GitHubHTTPError for error responses.
+    """
+
+    import httpx
+
+    headers = build_headers(accept=RAW_MEDIA_TYPE)
+    if start:
+        headers["Range"] = f"bytes={start}-"
+
+    try:
+        response = await send_async(
+            "GET",
+            url,
+            headers=headers,
+            params=params,
+            timeout=timeout or DEFAULT_TIMEOUT,
+            follow_redirects=True,
+            stream=True,
+        )
+    except httpx.HTTPError as e:
+        raise Exception(f"GitHub API request failed: {str(e)}")
+
+    if response.is_error:
+        await response.aread()
+        await response.aclose()
+        raise GitHubHTTPError(
+            f"GitHub API request failed: {response.status_code} {response.text[:200]}",
+            response.status_code,
+        )
+    return response
+
+
+async def iter_pages_async(url: str, params: dict | None = None) -> AsyncIterator[list]:
+    """Yield each page of a list endpoint, following Link: rel="next" """
+
+    while url:
+        body, links = await github_fetch_async(url, params=params)
+        yield body
+
+        # The next URL already carries the query string
+        url = links.get("next", {}).get("url")
+        params = None
+
+
+async def iter_items_async(
+    url: str,
+    params: dict | None = None,
+    max_items: int | None = None,
+    stop: Callable[[dict], bool] | None = None,
+) -> AsyncIterator[dict]:
+    """Stream items across pages of a list endpoint.
+
+    Stops without fetching further pages once `max_items` items have been
+    yielded or `stop(item)` returns True (that item is not yielded).
+    """
+
+    if max_items is not None and max_items <= 0:
+        return
+
+    count = 0
+    async for page in iter_pages_async(url, params=params):
+        for item in page:
+            if stop is not None and stop(item):
+                return
+            yield item
+            count += 1
+            if max_items is not None and count >= max_items:
+                return
+
+
+def _page_url(url: str, page: int) -> str:
+    parts = urlparse(url)
+    query = parse_qs(parts.query)
+    query["page"] = [str(page)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def _page_number(url: str) -> int:
+    return int(parse_qs(urlparse(url).query).get("page", ["1"])[0])
+
+
+def _item_key(item):
+    # Anonymous contributors have no id, fall back to the whole item
+    if isinstance(item, dict) and item.get("id") is not None:
+        return item["id"]
+    return json.dumps(item, sort_keys=True)
+
+
+async def gather_limited(coros, limit: int) -> list:
+    """Await coroutines with at most `limit` running at once, keeping order"""
+
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(run(coro) for coro in coros))
+
+
+async def fetch_items_async(
+    url: str,
+    params: dict | None = None,
+    max_items: int | None = None,
+    concurrency: int = PAGE_CONCURRENCY,
+) -> list:
+    """Fetch items across pages of a list endpoint, in parallel when possible.
+
+    The first page is fetched on its own. If it carries `Link: rel="last"`,
+    the remaining pages (only as many as `max_items` needs) are fetched
+    with bounded concurrency, reassembled in page order, and deduplicated
+    by id, since items can shift between pages while the fetch runs.
+    Without a last link the following pages are walked sequentially from
+    the first page's `rel="next"` link.
+    """
+
+    if max_items is not None and max_items <= 0:
+        return []
+
+    first_page, links = await github_fetch_async(url, params=params)
+    last_url = links.get("last", {}).get("url")
+    if not last_url:
+        # Walk the rest sequentially, keeping the first page already fetched
+        items = list(first_page)
+        next_url = links.get("next", {}).get("url")
+        if next_url and (max_items is None or len(items) < max_items):
+            remaining = None if max_items is None else max_items - len(items)
+            items.extend([item async for item in iter_items_async(next_url, max_items=remaining)])
+        return items[:max_items] if max_items else items
+
+    first = int((params or {}).get("page", 1))
+    last = _page_number(last_url)
+    if max_items is not None and first_page:
+        last = min(last, first + math.ceil(max_items / len(first_page)) - 1)
+
+    pages = [first_page]
+    if last > first:
+        page_urls = [_page_url(last_url, page) for page in range(first + 1, last + 1)]
+        pages.extend(
+            await gather_limited((github_get_async(u) for u in page_urls), concurrency)
+        )
+
+    items = []
+    seen = set()
+    for page in pages:
+        for item in page:
+            key = _item_key(item)
+            if key in seen:
+                continue
+            seen.add(key)
+            items.append(item)
+            if max_items is not None and len(items) >= max_items:
+                return items
+
+    return items
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 date or timestamp as an aware UTC datetime"""
+
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
@@ -13,23 +13,29 @@ Tools included:
 6. repository-contents: Browse repository files and folders
 7. user-info: Get user/organization information
 8. repository-contributors: Get repository contributor list
+9. batch-repository-details: Get details for many repositories at once
+10. repository-overview: Details, issues, PRs and contributors in one call
+11. code-search: Regex search over a repository's files
 
 These tools work together - outputs from one provide context for others.
 For example: search-repositories → repository-details → list-issues
 """
 
 # Import all the individual tools
+from batch_repository_details import batch_repository_details
+from code_search import code_search
 from list_issues import list_issues
 from list_pull_requests import list_pull_requests
 from repository_contents import repository_contents
 from repository_contributors import repository_contributors
 from repository_details import repository_details
+from repository_overview import repository_overview
 from search_issues import search_issues
 from search_repositories import search_repositories
 from user_info import user_info
 
-# All tools are automatically registered when imported
-# since each module calls project.tools.create()
+# Tool modules register nothing on their own; reading each tool object above
+# registered it with Braintrust (once), see tool_registry.py
 
 # Keep references to avoid unused import warnings
 _tools = [
@@ -41,19 +47,31 @@ _tools = [
     repository_contents,
     user_info,
     repository_contributors,
+    batch_repository_details,
+    repository_overview,
+    code_search,
 ]
 
-print("GitHub Tools loaded successfully!")
-print("\nAvailable tools:")
-print("1. search-repositories - Search for repositories")
-print("2. repository-details - Get repository details")
-print("3. list-issues - List repository issues")
-print("4. list-pull-requests - List repository PRs")
-print("5. search-issues - Search issues globally")
-print("6. repository-contents - Browse repository contents")
-print("7. user-info - Get user/org information")
-print("8. repository-contributors - Get contributor list")
-print("\nTo deploy: braintrust push github_tools.py")
-print(
-    "\nNote: Set GITHUB_TOKEN as environment variable in Braintrust for authenticated requests"
-)
+
+def print_banner():
+    print("GitHub Tools loaded successfully!")
+    print("\nAvailable tools:")
+    print("1. search-repositories - Search for repositories")
+    print("2. repository-details - Get repository details")
+    print("3. list-issues - List repository issues")
+    print("4. list-pull-requests - List repository PRs")
+    print("5. search-issues - Search issues globally")
+    print("6. repository-contents - Browse repository contents")
+    print("7. user-info - Get user/org information")
+    print("8. repository-contributors - Get contributor list")
+    print("9. batch-repository-details - Get details for many repositories")
+    print("10. repository-overview - Get a full repository overview in one call")
+    print("11. code-search - Search a repository's code with a regex")
+    print("\nTo deploy: braintrust push github_tools.py")
+    print(
+        "\nNote: Set GITHUB_TOKEN as environment variable in Braintrust for authenticated requests"
+    )
+
+
+if __name__ == "__main__":
+    print_banner()
@@ -0,0 +1,309 @@
+"""
+Local issue search for the Braintrust GitHub tools
+
+The search API has the tightest rate limit GitHub offers (30 requests a
+minute) and is the slowest endpoint the tools call. For repositories in the
+issue sync store (`issue_sync.py`), search-issues queries are answered from
+a local inverted index over issue and pull request titles, bodies and label
+names, ranked with BM25.
+
+Supported query syntax, anything else goes to the search API:
+- free text terms, all of which must match (titles count double)
+- repo:owner/name, required, naming one synced repository
+- is:open, is:closed, state:open, state:closed
+- is:issue, is:pr, type:issue, type:pr, is:merged, is:unmerged
+- label:name, label:"two words", label:a,b (either); repeat for all of
+- author:login, assignee:login
+- created: and updated: with >, >=, <, <=, a date, or a..b range
+
+Unlike the search API, comments are not indexed.
+
+The index is kept per repository and updated incrementally: only issues
+whose `updated_at` changed since the last query are re-tokenized.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from datetime import date, datetime
+
+from github_client import parse_timestamp
+from issue_sync import get_issue_store, repo_key, sync_enabled
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2
+
+_TOKEN = re.compile(r"\w+")
+_QUERY_PART = re.compile(r'(\S+?):("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+_DATE_QUALIFIER = re.compile(r"^(>=|<=|>|<)?(\S+)$")
+
+_SORT_FIELDS = {"created": "created_at", "updated": "updated_at", "comments": "comments"}
+
+
+def tokenize(text: str | None) -> list:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _document_terms(issue: dict) -> Counter:
+    terms = Counter(tokenize(issue.get("body")))
+    for term in tokenize(issue.get("title")):
+        terms[term] += TITLE_WEIGHT
+    for label in issue.get("labels") or []:
+        terms.update(tokenize(label.get("name")))
+    return terms
+
+
+class RepoIndex:
+    """Inverted index over one repository's issues"""
+
+    def __init__(self):
+        self.postings: dict[str, dict[int, int]] = {}
+        self.documents: dict[int, tuple] = {}  # number -> (updated_at, terms, length)
+        self.total_length = 0
+
+    def update(self, issues: list) -> int:
+        """Index new and changed issues, returning how many were (re)indexed"""
+
+        changed = 0
+        for issue in issues:
+            number = issue["number"]
+            current = self.documents.get(number)
+            if current is not None and current[0] == issue.get("updated_at"):
+                continue
+            if current is not None:
+                self._remove(number, current)
+            terms = _document_terms(issue)
+            length = sum(terms.values())
+            for term, count in terms.items():
+                self.postings.setdefault(term, {})[number] = count
+            self.documents[number] = (issue.get("updated_at"), terms, length)
+            self.total_length += length
+            changed += 1
+        return changed
+
+    def _remove(self, number: int, document: tuple):
+        _, terms, length = document
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(number, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_length -= length
+
+    def search(self, terms: list) -> dict:
+        """BM25 score for each issue containing every term"""
+
+        if not terms:
+            return {}
+        postings = [self.postings.get(term, {}) for term in terms]
+        if not all(postings):
+            return {}
+
+        count = len(self.documents)
+        average = self.total_length / count if count else 0
+        candidates = set.intersection(*(set(posting) for posting in postings))
+        scores = {}
+        for number in candidates:
+            length = self.documents[number][2]
+            score = 0.0
+            for posting in postings:
+                frequency = posting[number]
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                norm = K1 * (1 - B + B * length / average) if average else K1
+                score += idf * frequency * (K1 + 1) / (frequency + norm)
+            scores[number] = score
+        return scores
+
+
+def _date_filter(value: str):
+    """Predicate on an ISO timestamp for a created:/updated: qualifier value"""
+
+    def bound(text: str):
+        if text == "*":
+            return None
+        return date.fromisoformat(text) if len(text) == 10 else parse_timestamp(text)
+
+    def position(timestamp: str, against):
+        # Date-only bounds compare whole days, like the search API
+        parsed = parse_timestamp(timestamp)
+        return parsed if isinstance(against, datetime) else parsed.date()
+
+    if ".." in value:
+        low, high = (bound(part) for part in value.split("..", 1))
+        return lambda ts: (low is None or position(ts, low) >= low) and (
+            high is None or position(ts, high) <= high
+        )
+
+    operator, text = _DATE_QUALIFIER.match(value).groups()
+    target = bound(text)
+    if target is None:
+        return lambda ts: True
+    compare = {
+        ">": lambda a: a > target,
+        ">=": lambda a: a >= target,
+        "<": lambda a: a < target,
+        "<=": lambda a: a <= target,
+        None: lambda a: a == target,
+    }[operator]
+    return lambda ts: compare(position(ts, target))
+
+
+def parse_query(query: str) -> dict | None:
+    """Split a search query into repo, terms and filters, or None if it can't be answered locally"""
+
+    parsed = {"repo": None, "terms": [], "filters": []}
+    filters = parsed["filters"]
+
+    for match in _QUERY_PART.finditer(query):
+        qualifier, value, phrase, word = match.groups()
+        # Phrases, boolean operators and exclusions need the search API
+        if phrase is not None:
+            return None
+        if word is not None and (word in ("AND", "OR", "NOT") or word.startswith("-")):
+            return None
+        if word is not None:
+            parsed["terms"].extend(tokenize(word))
+            continue
+
+        qualifier = qualifier.lower()
+        value = value.strip('"')
+        lowered = value.lower()
+        try:
+            if qualifier == "repo":
+                if parsed["repo"] is not None or lowered.count("/") != 1:
+                    return None
+                parsed["repo"] = lowered
+            elif qualifier in ("is", "state") and lowered in ("open", "closed"):
+                filters.append(lambda issue, s=lowered: issue.get("state") == s)
+            elif qualifier in ("is", "type") and lowered in ("issue", "pr"):
+                is_pr = lowered == "pr"
+                filters.append(lambda issue, p=is_pr: bool(issue.get("pull_request")) == p)
+            elif qualifier == "is" and lowered in ("merged", "unmerged"):
+                merged = lowered == "merged"
+                filters.append(
+                    lambda issue, m=merged: bool(issue.get("pull_request"))
+                    and bool(issue["pull_request"].get("merged_at")) == m
+                )
+            elif qualifier == "label":
+                wanted = {name.strip().strip('"') for name in lowered.split(",") if name.strip()}
+                filters.append(
+                    lambda issue, w=wanted: any(
+                        (label.get("name") or "").lower() in w for label in issue.get("labels") or []
+                    )
+                )
+            elif qualifier == "author":
+                filters.append(
+                    lambda issue, a=lowered: ((issue.get("user") or {}).get("login") or "").lower() == a
+                )
+            elif qualifier == "assignee":
+                filters.append(
+                    lambda issue, a=lowered: any(
+                        (user.get("login") or "").lower() == a for user in issue.get("assignees") or []
+                    )
+                )
+            elif qualifier in ("created", "updated"):
+                test = _date_filter(value)
+                field = f"{qualifier}_at"
+                filters.append(lambda issue, t=test, f=field: bool(issue.get(f)) and t(issue[f]))
+            else:
+                return None
+        except ValueError:
+            # Malformed dates are left to the search API to report
+            return None
+
+    if parsed["repo"] is None:
+        return None
+    return parsed
+
+
+class IssueIndex:
+    """Per-repository inverted indexes kept in step with the issue sync store"""
+
+    def __init__(self):
+        self._repos: dict[str, RepoIndex] = {}
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.reindexed = 0
+
+    async def search_async(
+        self,
+        query: str,
+        sort: str | None = "created",
+        order: str = "desc",
+        per_page: int = 30,
+        page: int = 1,
+    ) -> dict | None:
+        """Search-API-shaped results for `query`, or None when it must go to GitHub"""
+
+        if sort and sort not in _SORT_FIELDS and sort != "best-match":
+            return None
+        parsed = parse_query(query)
+        if parsed is None:
+            return None
+
+        owner, repo = parsed["repo"].split("/")
+        store = get_issue_store()
+        if not (sync_enabled(owner, repo) or await store.synced_async(owner, repo)):
+            return None
+
+        issues = await store.issues_async(owner, repo)
+        with self._lock:
+            index = self._repos.setdefault(repo_key(owner, repo), RepoIndex())
+            self.reindexed += index.update(issues)
+            scores = index.search(parsed["terms"]) if parsed["terms"] else None
+            self.queries += 1
+
+        matches = [
+            issue
+            for issue in issues
+            if (scores is None or issue["number"] in scores)
+            and all(test(issue) for test in parsed["filters"])
+        ]
+
+        # Best match (no sort) ranks by BM25, otherwise like the search API's sorts
+        if sort in _SORT_FIELDS:
+            field = _SORT_FIELDS[sort]
+            matches.sort(key=lambda issue: (issue[field], issue["number"]), reverse=order != "asc")
+        elif scores is not None:
+            matches.sort(key=lambda issue: (-scores[issue["number"]], -issue["number"]))
+        else:
+            matches.sort(key=lambda issue: issue["created_at"], reverse=True)
+
+        window = matches[(page - 1) * per_page : page * per_page]
+        return {
+            "total_count": len(matches),
+            "incomplete_results": False,
+            "items": [
+                {**issue, "score": round(scores[issue["number"]], 4) if scores else 1.0}
+                for issue in window
+            ],
+            "source": "local",
+        }
+
+    def clear(self):
+        with self._lock:
+            self._repos.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "repositories": {
+                    key: {"issues": len(index.documents), "terms": len(index.postings)}
+                    for key, index in self._repos.items()
+                },
+                "queries": self.queries,
+                "reindexed": self.reindexed,
+            }
+
+
+_index = IssueIndex()
+
+
+def get_issue_index() -> IssueIndex:
+    """Return the process-wide issue index"""
+
+    return _index
@@ -0,0 +1,306 @@
+"""
+Incremental issue and pull request sync for the Braintrust GitHub tools
+
+Listing a busy repository's issues over and over refetches the same pages
+every time. The sync store keeps a local copy of a repository's issues
+(pull requests included, as GitHub's issues endpoint returns them) and
+answers list-issues queries from it.
+
+- The first refresh lists every issue with `state=all`
+- Each later refresh asks only for issues updated at or after the
+  high-water mark, the newest `updated_at` seen so far, and upserts them
+- Refreshes are walked newest first, one page after another: an issue
+  updated during the walk moves to the front, so it is picked up by the
+  next refresh, and the issues it displaces shift onto pages not yet
+  fetched instead of out of the walk
+- Concurrent queries share one refresh, and a repository is refreshed at
+  most once per sync interval
+- Filters (state, labels, since) and sorts (created, updated, comments)
+  are applied locally, matching the issues endpoint
+
+Deleted and transferred issues are not reported by `since` and stay in the
+store until it is cleared.
+
+Tuning (environment variables):
+- GITHUB_TOOLS_SYNC_PATH: SQLite file the store is persisted to, so it
+  survives restarts (memory only when unset)
+- GITHUB_TOOLS_SYNC_REPOS: comma-separated "owner/repo" list always served
+  from the store
+- GITHUB_TOOLS_SYNC_INTERVAL: seconds between refreshes (default 30)
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from github_client import GITHUB_API_URL, MAX_PER_PAGE, iter_items_async, parse_timestamp
+
+SYNC_INTERVAL = float(os.getenv("GITHUB_TOOLS_SYNC_INTERVAL", "30"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (repo, number)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    repo TEXT PRIMARY KEY,
+    high_water TEXT,
+    synced_at REAL NOT NULL
+);
+"""
+
+_SORT_FIELDS = {"created": "created_at", "updated": "updated_at", "comments": "comments"}
+
+
+def repo_key(owner: str, repo: str) -> str:
+    return f"{owner}/{repo}".lower()
+
+
+def sync_enabled(owner: str, repo: str) -> bool:
+    """Whether GITHUB_TOOLS_SYNC_REPOS lists this repository"""
+
+    repos = os.getenv("GITHUB_TOOLS_SYNC_REPOS", "")
+    return repo_key(owner, repo) in {r.strip().lower() for r in repos.split(",") if r.strip()}
+
+
+class RepoIssues:
+    """One repository's synced issues, keyed by number"""
+
+    def __init__(self, items: dict | None = None, high_water: str | None = None, synced_at=0.0):
+        self.items: dict[int, dict] = items or {}
+        self.high_water = high_water
+        self.synced_at = synced_at
+
+    def merge(self, changed: list):
+        for issue in changed:
+            self.items[issue["number"]] = issue
+            updated = issue.get("updated_at")
+            if updated and (self.high_water is None or updated > self.high_water):
+                self.high_water = updated
+
+
+class IssueStore:
+    """Per-repository issue store, refreshed incrementally with `since`"""
+
+    def __init__(self, path: str | None = None, interval: float = SYNC_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._repos: dict[str, RepoIssues] = {}
+        self._refreshing: dict[tuple, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.refreshes = 0
+        self.fetched = 0
+
+        if path:
+            with self._connect() as conn:
+                conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads, keep one each
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self, key: str) -> RepoIssues:
+        """A repository's issues from the SQLite file, empty when never synced"""
+
+        if not self.path:
+            return RepoIssues()
+        conn = self._connect()
+        state = conn.execute(
+            "SELECT high_water, synced_at FROM sync_state WHERE repo = ?", (key,)
+        ).fetchone()
+        if state is None:
+            return RepoIssues()
+        items = {
+            number: json.loads(zlib.decompress(body))
+            for number, body in conn.execute(
+                "SELECT number, body FROM issues WHERE repo = ?", (key,)
+            )
+        }
+        # Loaded from disk: the first query in this process refreshes it
+        return RepoIssues(items, state[0], 0.0)
+
+    def _save(self, key: str, state: RepoIssues, changed: list):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO issues (repo, number, body) VALUES (?, ?, ?)",
+                [
+                    (key, issue["number"], zlib.compress(json.dumps(issue).encode()))
+                    for issue in changed
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (repo, high_water, synced_at) VALUES (?, ?, ?)",
+                (key, state.high_water, time.time()),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def _repo(self, key: str) -> RepoIssues:
+        state = self._repos.get(key)
+        if state is None:
+            loaded = await asyncio.to_thread(self._load, key)
+            with self._lock:
+                state = self._repos.setdefault(key, loaded)
+        return state
+
+    async def synced_async(self, owner: str, repo: str) -> bool:
+        """Whether this repository has been synced, in this process or a persisted one"""
+
+        return (await self._repo(repo_key(owner, repo))).high_water is not None
+
+    async def refresh_async(self, owner: str, repo: str, force: bool = False) -> RepoIssues:
+        """Bring a repository up to date, fetching only what changed since the last refresh"""
+
+        key = repo_key(owner, repo)
+        state = await self._repo(key)
+        if not force and time.time() - state.synced_at < self.interval:
+            return state
+
+        # Concurrent queries share one refresh, run outside the first caller's
+        # context so its deadline doesn't cut a long first sync short for all
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+        task = self._refreshing.get(flight)
+        if task is None:
+            task = loop.create_task(
+                self._refresh(owner, repo, key, state), context=contextvars.Context()
+            )
+            self._refreshing[flight] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(flight, None))
+        await asyncio.shield(task)
+        return state
+
+    async def _refresh(self, owner: str, repo: str, key: str, state: RepoIssues):
+        params = {
+            "state": "all",
+            "sort": "updated",
+            "direction": "desc",
+            "per_page": MAX_PER_PAGE,
+        }
+        # Inclusive, so issues updated in the same second as the mark are not missed
+        if state.high_water:
+            params["since"] = state.high_water
+
+        # Pages are walked in order, following rel="next". Fetched out of
+        # order, an issue pushed from one page to the next by an update
+        # during the walk can be missed by both, and then never refetched
+        # once the high-water mark has passed it
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues"
+        changed = [issue async for issue in iter_items_async(url, params=params)]
+
+        with self._lock:
+            state.merge(changed)
+            state.synced_at = time.time()
+            self.refreshes += 1
+            self.fetched += len(changed)
+        if self.path:
+            await asyncio.to_thread(self._save, key, state, changed)
+
+    async def issues_async(self, owner: str, repo: str) -> list:
+        """Every stored issue of a repository after refreshing it, in no particular order"""
+
+        state = await self.refresh_async(owner, repo)
+        with self._lock:
+            return list(state.items.values())
+
+    async def query_async(
+        self,
+        owner: str,
+        repo: str,
+        state: str = "open",
+        labels: str | None = None,
+        sort: str = "created",
+        direction: str = "desc",
+        since: str | None = None,
+    ) -> list:
+        """Issues matching the list-issues filters, in the requested order"""
+
+        if sort not in _SORT_FIELDS:
+            raise Exception(f"Invalid sort: {sort}. Use created, updated or comments")
+
+        wanted_labels = {l.strip().lower() for l in (labels or "").split(",") if l.strip()}
+        since_at = parse_timestamp(since) if since else None
+
+        def matches(issue: dict) -> bool:
+            if state != "all" and issue.get("state") != state:
+                return False
+            if wanted_labels:
+                names = {label.get("name", "").lower() for label in issue.get("labels") or []}
+                if not wanted_labels <= names:
+                    return False
+            if since_at and parse_timestamp(issue["updated_at"]) < since_at:
+                return False
+            return True
+
+        field = _SORT_FIELDS[sort]
+        issues = [issue for issue in await self.issues_async(owner, repo) if matches(issue)]
+        issues.sort(key=lambda issue: (issue[field], issue["number"]))
+        if direction != "asc":
+            issues.reverse()
+        return issues
+
+    def clear(self, owner: str | None = None, repo: str | None = None):
+        """Forget one repository, or every repository when none is given"""
+
+        key = repo_key(owner, repo) if owner and repo else None
+        with self._lock:
+            if key:
+                self._repos.pop(key, None)
+            else:
+                self._repos.clear()
+        if self.path:
+            conn = self._connect()
+            for table in ("issues", "sync_state"):
+                if key:
+                    conn.execute(f"DELETE FROM {table} WHERE repo = ?", (key,))
+                else:
+                    conn.execute(f"DELETE FROM {table}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "repositories": {
+                    key: {
+                        "issues": len(state.items),
+                        "high_water": state.high_water,
+                        "synced_at": state.synced_at,
+                    }
+                    for key, state in self._repos.items()
+                },
+                "refreshes": self.refreshes,
+                "fetched": self.fetched,
+                "path": self.path,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_issue_store() -> IssueStore:
+    """Return the shared issue store, persisted when GITHUB_TOOLS_SYNC_PATH is set"""
+
+    global _store
+    path = os.getenv("GITHUB_TOOLS_SYNC_PATH") or None
+    if _store is None or _store.path != path:
+        with _store_lock:
+            if _store is None or _store.path != path:
+                _store = IssueStore(path)
+    return _store
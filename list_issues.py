@@ -5,13 +5,24 @@ This tool lists issues from a specific repository.
 Works with repository information from search or details tools.
 """
 
-import os
 from typing import List, Optional
 
-import braintrust
-import requests
 from pydantic import BaseModel
 
+from github_client import (
+    GITHUB_API_URL,
+    MAX_PER_PAGE,
+    fetch_items_async,
+    github_get_async,
+    iter_pages_async,
+    sync_handler,
+)
+from issue_sync import get_issue_store, sync_enabled
+from output_budget import collect_within_budget, single_page
+from projection import project_response, wants_projection
+from response_cache import cached
+from tool_registry import lazy_tool
+
 
 class ListIssuesParams(BaseModel):
     owner: str
@@ -23,6 +34,12 @@ class ListIssuesParams(BaseModel):
     since: Optional[str] = None  # ISO 8601 format
     per_page: Optional[int] = 30  # max 100
     page: Optional[int] = 1
+    all_pages: Optional[bool] = False  # follow pagination and return every page
+    max_items: Optional[int] = None  # stop paginating after this many issues
+    output: Optional[str] = "raw"  # raw, projected (trimmed to the model fields)
+    fields: Optional[List[str]] = None  # only these fields, e.g. ["number", "user.login"]
+    max_output_bytes: Optional[int] = None  # truncate bodies and drop fields to fit
+    sync: Optional[bool] = False  # answer from the local sync store, fetching only changes
 
 
 class IssueUser(BaseModel):
@@ -33,7 +50,7 @@ class IssueUser(BaseModel):
 
 
 class IssueLabel(BaseModel):
-    id: int
+    id: Optional[int]  # None when fetched through GraphQL
     name: str
     color: str
     description: Optional[str]
@@ -63,7 +80,8 @@ class ListIssuesResponse(BaseModel):
     total_count: int
 
 
-def list_issues_handler(
+@cached("list-issues")
+async def list_issues_handler_async(
     owner: str,
     repo: str,
     state: str = "open",
@@ -73,22 +91,30 @@ def list_issues_handler(
     since: str | None = None,
     per_page: int = 30,
     page: int = 1,
+    all_pages: bool = False,
+    max_items: int | None = None,
+    output: str = "raw",
+    fields: List[str] | None = None,
+    max_output_bytes: int | None = None,
+    sync: bool = False,
 ):
     """List repository issues using GitHub API"""
 
-    # Get GitHub token from environment
-    github_token = os.getenv("GITHUB_TOKEN")
+    projected = wants_projection(output, fields)
 
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "Braintrust-GitHub-Tools",
-    }
-
-    if github_token:
-        headers["Authorization"] = f"Bearer {github_token}"
+    # Filter and sort the local store, after pulling only issues updated since its last refresh
+    local = sync or sync_enabled(owner, repo)
+    if local:
+        issues = await get_issue_store().query_async(
+            owner, repo, state=state, labels=labels, sort=sort, direction=direction, since=since
+        )
+        if all_pages or max_items:
+            issues = issues[:max_items] if max_items else issues
+        else:
+            issues = issues[(page - 1) * per_page : page * per_page]
 
     # Build the API URL
-    url = f"https://api.github.com/repos/{owner}/{repo}/issues"
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues"
 
     # Build query parameters
     query_params = {
@@ -104,25 +130,44 @@ def list_issues_handler(
     if since:
         query_params["since"] = since
 
-    try:
-        response = requests.get(url, headers=headers, params=query_params)
-        response.raise_for_status()
-
-        # Return the raw JSON response
-        return response.json()
-
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"GitHub API request failed: {str(e)}")
-    except KeyError as e:
-        raise Exception(f"Unexpected response format: {str(e)}")
-
-
-project = braintrust.projects.create(name="github-tools")
-
-list_issues = project.tools.create(
-    name="List Repository Issues",
-    slug="list-issues",
-    description="""
+    # Fit the output into a byte budget as pages arrive, paging stops once it is full
+    if max_output_bytes:
+        if local:
+            pages = single_page(issues)
+        elif all_pages or max_items:
+            query_params.update(per_page=MAX_PER_PAGE, page=1)
+            pages = iter_pages_async(url, params=query_params)
+        else:
+            pages = single_page(await github_get_async(url, params=query_params))
+        transform = (lambda page: project_response(page, Issue, fields)) if projected else None
+        return await collect_within_budget(
+            pages,
+            max_output_bytes,
+            max_items=max_items,
+            expected_items=per_page,
+            transform=transform,
+        )
+
+    # Walk the pages internally so one tool call replaces many
+    if not local and (all_pages or max_items):
+        query_params.update(per_page=MAX_PER_PAGE, page=1)
+        issues = await fetch_items_async(url, params=query_params, max_items=max_items)
+    elif not local:
+        issues = await github_get_async(url, params=query_params)
+
+    if projected:
+        return project_response(issues, Issue, fields)
+
+    # Return the raw JSON response
+    return issues
+
+
+list_issues_handler = sync_handler(list_issues_handler_async)
+
+TOOL = {
+    "name": "List Repository Issues",
+    "slug": "list-issues",
+    "description": """
     List issues from a GitHub repository with filtering options.
     
     Use this tool after getting repository information to explore issues.
@@ -133,14 +178,33 @@ list_issues = project.tools.create(
     - sort: order by created, updated, or comments
     - since: only issues updated after this date
     
+    Pagination:
+    - all_pages: return every page of results in a single call
+    - max_items: return up to this many issues across pages
+    - with either, results start from the first issue; page and per_page are ignored
+
+    Sync:
+    - sync: keep a local copy of the repository's issues and answer from
+      it; each call only fetches issues updated since the last one. Best
+      for repositories queried repeatedly
+    
     The output includes issue details that can help understand:
     - What problems the repository is solving
     - Community engagement level
     - Areas needing attention
     
+    Output options:
+    - output: "raw" (full GitHub JSON) or "projected" (only Issue model fields)
+    - fields: keep only these fields, e.g. ["number", "title", "user.login"]
+    - max_output_bytes: fit the output into this many bytes by truncating
+      bodies and dropping low-value fields; returns {"items", "elided"}
+      where "elided" reports what was cut
+    
     Use individual issue numbers with other tools for detailed analysis.
     """,
-    handler=list_issues_handler,
-    parameters=ListIssuesParams,
-    if_exists="replace",
-)
+    "handler": list_issues_handler,
+    "parameters": ListIssuesParams,
+}
+
+# Registered with Braintrust on first access to `list_issues`, see tool_registry.py
+__getattr__ = lazy_tool("list_issues", TOOL)
@@ -6,12 +6,42 @@ Works with repository information from search or details tools.
 """
 
 import os
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
-import braintrust
-import requests
 from pydantic import BaseModel
 
+from github_client import (
+    GITHUB_API_URL,
+    MAX_PER_PAGE,
+    fetch_items_async,
+    gather_limited,
+    github_get_async,
+    iter_items_async,
+    iter_pages_async,
+    parse_timestamp,
+    sync_handler,
+)
+from output_budget import collect_within_budget, single_page
+from projection import project_response, wants_projection
+from response_cache import cached, get_response_cache
+from tool_registry import lazy_tool
+
+# Fields the list endpoint leaves out, filled in from each PR's detail endpoint
+ENRICHED_FIELDS = (
+    "commits",
+    "additions",
+    "deletions",
+    "changed_files",
+    "comments",
+    "review_comments",
+    "maintainer_can_modify",
+)
+ENRICH_CONCURRENCY = int(os.getenv("GITHUB_TOOLS_ENRICH_CONCURRENCY", "8"))
+MAX_ENRICHED = 100
+
+# Details are cached by updated_at, which changes whenever they can, so keep them long
+ENRICH_TTL = 3600
+
 
 class ListPullRequestsParams(BaseModel):
     owner: str
@@ -23,6 +53,13 @@ class ListPullRequestsParams(BaseModel):
     direction: Optional[str] = "desc"  # asc, desc
     per_page: Optional[int] = 30  # max 100
     page: Optional[int] = 1
+    since: Optional[str] = None  # ISO 8601 format, only PRs updated after this
+    all_pages: Optional[bool] = False  # follow pagination and return every page
+    max_items: Optional[int] = None  # stop paginating after this many PRs
+    output: Optional[str] = "raw"  # raw, projected (trimmed to the model fields)
+    fields: Optional[List[str]] = None  # only these fields, e.g. ["number", "head.ref"]
+    max_output_bytes: Optional[int] = None  # truncate bodies and drop fields to fit
+    enrich: Optional[bool] = False  # add commits, additions, deletions, ... per PR
 
 
 class PullRequestUser(BaseModel):
@@ -41,7 +78,7 @@ class PullRequestBranch(BaseModel):
 
 
 class PullRequestLabel(BaseModel):
-    id: int
+    id: Optional[int]  # None when fetched through GraphQL
     name: str
     color: str
     description: Optional[str]
@@ -84,7 +121,55 @@ class ListPullRequestsResponse(BaseModel):
     total_count: int
 
 
-def list_pull_requests_handler(
+async def _pull_request_details(owner: str, repo: str, pr: dict) -> dict:
+    """The ENRICHED_FIELDS of one PR, from the cache while its updated_at is unchanged"""
+
+    cache = get_response_cache()
+    key = f"pull-request-details:{owner.lower()}/{repo.lower()}#{pr['number']}@{pr['updated_at']}"
+    hit, details = cache.get(key)
+    if hit:
+        return details
+
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{pr['number']}"
+    full = await github_get_async(url)
+    details = {field: full.get(field) for field in ENRICHED_FIELDS}
+    cache.set("list-pull-requests", key, details, ttl=ENRICH_TTL)
+    return details
+
+
+async def _enrich_one(owner: str, repo: str, pr: dict) -> dict:
+    # Each PR reports its own error so one failed lookup doesn't fail the list
+    try:
+        return {**pr, **await _pull_request_details(owner, repo, pr)}
+    except Exception as e:
+        return {**pr, "enrich_error": str(e)}
+
+
+def _project(pull_requests: list, fields: List[str] | None) -> list:
+    """Project PRs to the model, keeping the enrich_error the model doesn't declare"""
+
+    projected = project_response(pull_requests, PullRequest, fields)
+    for pr, item in zip(pull_requests, projected):
+        if "enrich_error" in pr:
+            item["enrich_error"] = pr["enrich_error"]
+    return projected
+
+
+async def enrich_pull_requests(owner: str, repo: str, pull_requests: list) -> list:
+    """Merge per-PR details into list items, at most ENRICH_CONCURRENCY requests at once.
+
+    Only the first MAX_ENRICHED PRs are enriched.
+    """
+
+    enriched = await gather_limited(
+        (_enrich_one(owner, repo, pr) for pr in pull_requests[:MAX_ENRICHED]),
+        ENRICH_CONCURRENCY,
+    )
+    return enriched + pull_requests[MAX_ENRICHED:]
+
+
+@cached("list-pull-requests")
+async def list_pull_requests_handler_async(
     owner: str,
     repo: str,
     state: str = "open",
@@ -94,22 +179,20 @@ def list_pull_requests_handler(
     direction: str = "desc",
     per_page: int = 30,
     page: int = 1,
+    since: str | None = None,
+    all_pages: bool = False,
+    max_items: int | None = None,
+    output: str = "raw",
+    fields: List[str] | None = None,
+    max_output_bytes: int | None = None,
+    enrich: bool = False,
 ):
     """List repository pull requests using GitHub API"""
 
-    # Get GitHub token from environment
-    github_token = os.getenv("GITHUB_TOKEN")
-
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "Braintrust-GitHub-Tools",
-    }
-
-    if github_token:
-        headers["Authorization"] = f"Bearer {github_token}"
+    projected = wants_projection(output, fields)
 
     # Build the API URL
-    url = f"https://api.github.com/repos/{owner}/{repo}/pulls"
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls"
 
     # Build query parameters
     query_params = {
@@ -125,25 +208,100 @@ def list_pull_requests_handler(
     if base:
         query_params["base"] = base
 
-    try:
-        response = requests.get(url, headers=headers, params=query_params)
-        response.raise_for_status()
+    # The pulls endpoint has no `since` filter, so apply it client-side
+    cutoff = parse_timestamp(since) if since else None
+
+    def is_recent(pr: dict) -> bool:
+        return cutoff is None or parse_timestamp(pr["updated_at"]) >= cutoff
+
+    # Newest-updated-first ordering lets us stop at the first older PR
+    stop = None
+    if cutoff is not None and sort == "updated" and direction == "desc":
+        stop = lambda pr: not is_recent(pr)  # noqa: E731
+
+    # Fit the output into a byte budget as pages arrive, paging stops once it is full
+    if max_output_bytes:
+        if all_pages or max_items:
+            query_params.update(per_page=MAX_PER_PAGE, page=1)
+            pages = iter_pages_async(url, params=query_params)
+        else:
+            pages = single_page(await github_get_async(url, params=query_params))
+
+        async def filtered(pages: AsyncIterator[list]) -> AsyncIterator[list]:
+            # Filter before enriching, so no details are fetched for dropped PRs
+            count = 0
+            async for page in pages:
+                recent = [pr for pr in page if is_recent(pr)]
+                extra = []
+                if max_items:
+                    # One PR past max_items is passed on unenriched, so the
+                    # budget's own max_items check reports more as available
+                    wanted = max_items - count
+                    recent, extra = recent[:wanted], recent[wanted : wanted + 1]
+                    count += len(recent)
+                if enrich:
+                    recent = await enrich_pull_requests(owner, repo, recent)
+                yield recent + extra
+                if extra or (stop is not None and any(not is_recent(pr) for pr in page)):
+                    return
+
+        pages = filtered(pages)
+
+        def transform(page: list) -> list:
+            return _project(page, fields) if projected else page
 
-        # Return the raw JSON response
-        return response.json()
+        return await collect_within_budget(
+            pages,
+            max_output_bytes,
+            max_items=max_items,
+            expected_items=per_page,
+            transform=transform,
+        )
 
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"GitHub API request failed: {str(e)}")
-    except KeyError as e:
-        raise Exception(f"Unexpected response format: {str(e)}")
+    # Walk the pages internally so one tool call replaces many
+    if all_pages or max_items:
+        query_params.update(per_page=MAX_PER_PAGE, page=1)
 
+        if stop is not None:
+            items = [
+                pr
+                async for pr in iter_items_async(
+                    url, params=query_params, max_items=max_items, stop=stop
+                )
+            ]
+        elif cutoff is not None:
+            # Every page has to be scanned for the client-side filter
+            items = await fetch_items_async(url, params=query_params)
+        else:
+            items = await fetch_items_async(url, params=query_params, max_items=max_items)
 
-project = braintrust.projects.create(name="github-tools")
+        pull_requests = []
+        for pr in items:
+            if is_recent(pr):
+                pull_requests.append(pr)
+                if max_items and len(pull_requests) >= max_items:
+                    break
+    else:
+        pull_requests = await github_get_async(url, params=query_params)
+        if cutoff is not None:
+            pull_requests = [pr for pr in pull_requests if is_recent(pr)]
 
-list_pull_requests = project.tools.create(
-    name="List Repository Pull Requests",
-    slug="list-pull-requests",
-    description="""
+    if enrich:
+        pull_requests = await enrich_pull_requests(owner, repo, pull_requests)
+
+    if projected:
+        return _project(pull_requests, fields)
+
+    # Return the raw JSON response
+    return pull_requests
+
+
+list_pull_requests_handler = sync_handler(list_pull_requests_handler_async)
+
+TOOL = {
+    "name": "List Repository Pull Requests",
+    "slug": "list-pull-requests",
+    "description": """
     List pull requests from a GitHub repository with filtering options.
     
     Use this tool after getting repository information to explore PRs.
@@ -153,6 +311,14 @@ list_pull_requests = project.tools.create(
     - head: filter by head branch (e.g., "feature-branch")
     - base: filter by base branch (e.g., "main", "develop")
     - sort: order by created, updated, or popularity
+    - since: only PRs updated after this date
+    
+    Pagination:
+    - all_pages: return every page of results in a single call
+    - max_items: return up to this many PRs across pages
+    - with either, results start from the first PR; page and per_page are ignored
+    - with since, sort=updated and direction=desc, paging stops at the
+      first PR older than the cutoff
     
     The output includes PR details that help understand:
     - Active development work
@@ -160,9 +326,24 @@ list_pull_requests = project.tools.create(
     - Contribution patterns
     - Branch strategies
     
+    Output options:
+    - output: "raw" (full GitHub JSON) or "projected" (only PullRequest model fields)
+    - fields: keep only these fields, e.g. ["number", "title", "head.ref"]
+    - max_output_bytes: fit the output into this many bytes by truncating
+      bodies and dropping low-value fields; returns {"items", "elided"}
+      where "elided" reports what was cut
+
+    Enrichment:
+    - enrich: also fetch each PR's commits, additions, deletions,
+      changed_files, comments, review_comments and maintainer_can_modify,
+      which the list endpoint leaves out (first 100 PRs, fetched
+      concurrently and cached). Saves one call per PR
+    
     Use individual PR numbers for detailed analysis of changes.
     """,
-    handler=list_pull_requests_handler,
-    parameters=ListPullRequestsParams,
-    if_exists="replace",
-)
+    "handler": list_pull_requests_handler,
+    "parameters": ListPullRequestsParams,
+}
+
+# Registered with Braintrust on first access to `list_pull_requests`, see tool_registry.py
+__getattr__ = lazy_tool("list_pull_requests", TOOL)
@@ -0,0 +1,210 @@
+"""
+Output byte budgets for the Braintrust GitHub tools
+
+Issue and pull request bodies can be tens of KB each, so a single page of
+100 can run to megabytes. With `max_output_bytes`, list/search tools fit
+their output into a byte budget while pages are being fetched:
+
+1. Long text fields (`body`) are cut to a per-item share of the budget
+2. If an item still doesn't fit, low-value fields are dropped in order:
+   API `*_url` links, bookkeeping fields, nested user objects reduced to
+   their login, and finally the body itself
+3. Once nothing more fits, paging stops and the rest is reported as omitted
+
+Every step is counted in an `elided` report returned next to the items,
+so the caller knows what it is not seeing.
+"""
+
+import json
+from typing import AsyncIterator, Callable
+
+# Text fields that get truncated before anything is dropped
+TEXT_FIELDS = ("body",)
+
+# Never truncate text below this many characters
+MIN_TEXT_CHARS = 200
+
+# Fields dropped when an item doesn't fit, least valuable first
+BOOKKEEPING_FIELDS = (
+    "node_id",
+    "reactions",
+    "performed_via_github_app",
+    "author_association",
+    "active_lock_reason",
+    "state_reason",
+    "sub_issues_summary",
+    "timeline_url",
+    "_links",
+)
+USER_FIELDS = ("user", "assignee", "assignees", "closed_by", "requested_reviewers")
+
+TRUNCATION_MARKER = "\n\n[truncated]"
+
+
+def _size(value) -> int:
+    return len(json.dumps(value, separators=(",", ":"), default=str).encode())
+
+
+def _drop_api_urls(item: dict) -> list:
+    # html_url is the one link worth keeping
+    dropped = [key for key in item if key.endswith("_url") and key != "html_url"]
+    for key in dropped:
+        del item[key]
+    if "url" in item:
+        del item["url"]
+        dropped.append("url")
+    return dropped
+
+
+def _drop_bookkeeping(item: dict) -> list:
+    dropped = [key for key in BOOKKEEPING_FIELDS if key in item]
+    for key in dropped:
+        del item[key]
+    return dropped
+
+
+def _compact_users(item: dict) -> list:
+    compacted = []
+    for key in USER_FIELDS:
+        value = item.get(key)
+        if isinstance(value, dict) and "login" in value:
+            item[key] = {"login": value["login"]}
+            compacted.append(key)
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            item[key] = [{"login": user.get("login")} for user in value]
+            compacted.append(key)
+    return compacted
+
+
+def _drop_text(item: dict) -> list:
+    dropped = [key for key in TEXT_FIELDS if item.get(key)]
+    for key in dropped:
+        item[key] = None
+    return dropped
+
+
+# Applied in order until the item fits
+_REDUCTIONS = (_drop_api_urls, _drop_bookkeeping, _compact_users, _drop_text)
+
+
+class OutputBudget:
+    """Accumulates items under a byte budget, shrinking or refusing them as needed"""
+
+    def __init__(self, max_bytes: int, expected_items: int = 30):
+        self.max_bytes = max_bytes
+        self.used = 2  # the enclosing []
+        self.items: list = []
+        self.full = False
+
+        # Each text field gets an even share of the budget up front
+        self.text_limit = max(MIN_TEXT_CHARS, max_bytes // max(expected_items, 1) // 2)
+
+        self.truncated_fields = 0
+        self.dropped_fields: dict[str, int] = {}
+        self.omitted_items = 0
+
+    def add(self, item) -> bool:
+        """Add one item, returning False once the budget is full"""
+
+        if self.full:
+            self.omitted_items += 1
+            return False
+
+        if isinstance(item, dict):
+            # Shallow copy, items may be shared with the response caches
+            item = dict(item)
+            for key in TEXT_FIELDS:
+                text = item.get(key)
+                if isinstance(text, str) and len(text) > self.text_limit:
+                    item[key] = text[: self.text_limit] + TRUNCATION_MARKER
+                    self.truncated_fields += 1
+
+        size = _size(item) + 1  # separating comma
+        remaining = self.max_bytes - self.used
+
+        if size > remaining and isinstance(item, dict):
+            for reduce in _REDUCTIONS:
+                for key in reduce(item):
+                    self.dropped_fields[key] = self.dropped_fields.get(key, 0) + 1
+                size = _size(item) + 1
+                if size <= remaining:
+                    break
+
+        if size > remaining:
+            self.full = True
+            self.omitted_items += 1
+            return False
+
+        self.items.append(item)
+        self.used += size
+        return True
+
+    def report(self, more_available: bool = False) -> dict:
+        return {
+            "max_output_bytes": self.max_bytes,
+            "output_bytes": self.used,
+            "items_returned": len(self.items),
+            "items_omitted": self.omitted_items,
+            # True when paging stopped early, so more items exist than were counted
+            "more_available": more_available,
+            "truncated_text_fields": self.truncated_fields,
+            "dropped_fields": self.dropped_fields,
+        }
+
+
+async def single_page(items: list) -> AsyncIterator[list]:
+    """Wrap an already-fetched page for `collect_within_budget`"""
+
+    yield items
+
+
+async def collect_within_budget(
+    pages: AsyncIterator[list],
+    max_output_bytes: int,
+    max_items: int | None = None,
+    expected_items: int = 30,
+    transform: Callable[[list], list] | None = None,
+    stop: Callable[[dict], bool] | None = None,
+) -> dict:
+    """Consume pages into a byte budget, stopping as soon as it is full.
+
+    `transform` is applied to each raw page (e.g. filtering or projection)
+    before its items are budgeted; `stop(item)` ends paging at that item.
+    Returns {"items": [...], "elided": report}.
+    """
+
+    budget = OutputBudget(max_output_bytes, expected_items=max_items or expected_items)
+    more_available = False
+
+    async for page in pages:
+        if stop is not None:
+            kept = []
+            for item in page:
+                if stop(item):
+                    break
+                kept.append(item)
+            stopped = len(kept) < len(page)
+            page = kept
+        else:
+            stopped = False
+
+        if transform is not None:
+            page = transform(page)
+
+        for index, item in enumerate(page):
+            if max_items is not None and len(budget.items) >= max_items:
+                more_available = True
+                break
+            if not budget.add(item):
+                # Count what was already fetched but not returned, up to what was asked for
+                omitted = len(page) - index - 1
+                if max_items is not None:
+                    omitted = min(omitted, max_items - len(budget.items) - 1)
+                budget.omitted_items += omitted
+                more_available = True
+                break
+
+        if more_available or stopped:
+            break
+
+    return {"items": budget.items, "elided": budget.report(more_available)}
@@ -0,0 +1,147 @@
+"""
+Field projection for the Braintrust GitHub tools
+
+GitHub's raw payloads carry dozens of `*_url` fields and nested objects the
+tools' pydantic models don't declare. Projection trims a response down to
+the declared model fields, optionally narrowed further to a caller-supplied
+list of (dotted) field names such as ["number", "title", "user.login"].
+
+Trimming is done in one pydantic-core validate/dump pass over the whole
+payload using a cached `TypeAdapter`, not a Python loop per item. The
+adapters are built on relaxed copies of the models where every field is
+optional, so fields GitHub leaves out of a particular endpoint come back as
+None instead of failing validation.
+"""
+
+import functools
+from typing import List, Optional, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter, create_model
+
+OUTPUT_MODES = ("raw", "projected")
+
+
+def _relax(annotation):
+    """Swap model types inside an annotation for their relaxed versions"""
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return relaxed_model(annotation)
+
+    origin = get_origin(annotation)
+    if origin in (list, List):
+        return List[_relax(get_args(annotation)[0])]
+    if origin is Union or (origin is not None and type(None) in get_args(annotation)):
+        args = tuple(_relax(arg) for arg in get_args(annotation) if arg is not type(None))
+        return Optional[Union[args]] if len(args) > 1 else Optional[args[0]]
+    return annotation
+
+
+@functools.lru_cache(maxsize=None)
+def relaxed_model(model: type[BaseModel]) -> type[BaseModel]:
+    """Copy of `model` where every field, nested models included, is optional"""
+
+    fields = {
+        name: (Optional[_relax(field.annotation)], None)
+        for name, field in model.model_fields.items()
+    }
+    return create_model(f"Projected{model.__name__}", **fields)
+
+
+@functools.lru_cache(maxsize=None)
+def _adapter(model: type[BaseModel], many: bool) -> TypeAdapter:
+    relaxed = relaxed_model(model)
+    return TypeAdapter(List[relaxed] if many else relaxed)
+
+
+def _is_list(annotation) -> bool:
+    if get_origin(annotation) in (list, List):
+        return True
+    return any(_is_list(arg) for arg in get_args(annotation) if arg is not type(None))
+
+
+def _nested_model(annotation) -> type[BaseModel] | None:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        nested = _nested_model(arg)
+        if nested is not None:
+            return nested
+    return None
+
+
+def _is_dict(annotation) -> bool:
+    if annotation is dict or get_origin(annotation) is dict:
+        return True
+    return any(_is_dict(arg) for arg in get_args(annotation))
+
+
+def _check_names(model: type[BaseModel], names, prefix: str):
+    unknown = [name for name in names if name not in model.model_fields]
+    if unknown:
+        raise Exception(
+            f"Unknown field {prefix}{unknown[0]}, valid fields are: "
+            + ", ".join(prefix + name for name in model.model_fields)
+        )
+
+
+def _include(model: type[BaseModel] | None, fields: list[str], prefix: str = "") -> dict:
+    """Turn ["user.login", "labels.name"] into pydantic's nested include spec.
+
+    Raises on names the model doesn't declare; below an untyped dict field
+    (e.g. "milestone.title") names are passed through unchecked.
+    """
+
+    grouped: dict = {}
+    for field in fields:
+        name, _, rest = field.partition(".")
+        children = grouped.setdefault(name, [])
+        # A bare name keeps the whole field, even if a sub-field was also asked for
+        if not rest or children is None:
+            grouped[name] = None
+        else:
+            children.append(rest)
+
+    if model is not None:
+        _check_names(model, grouped, prefix)
+
+    include = {}
+    for name, children in grouped.items():
+        if not children:
+            include[name] = True
+            continue
+
+        annotation = model.model_fields[name].annotation if model is not None else None
+        nested_model = _nested_model(annotation)
+        if model is not None and nested_model is None and not _is_dict(annotation):
+            raise Exception(f"Field {prefix}{name} has no sub-fields")
+        nested = _include(nested_model, children, f"{prefix}{name}.")
+        # Sub-fields of a list field apply to every element
+        include[name] = {"__all__": nested} if _is_list(annotation) else nested
+    return include
+
+
+def project_response(data, model: type[BaseModel], fields: list[str] | None = None):
+    """Trim a raw GitHub payload (one object or a list) to `model`'s fields.
+
+    With `fields`, only those (dotted) fields are kept.
+    """
+
+    many = isinstance(data, list)
+    adapter = _adapter(model, many)
+    validated = adapter.validate_python(data)
+
+    include = None
+    if fields:
+        include = _include(model, fields)
+        if many:
+            include = {"__all__": include}
+
+    return adapter.dump_python(validated, include=include)
+
+
+def wants_projection(output: str, fields: list[str] | None) -> bool:
+    """True when a handler should project its response"""
+
+    if output not in OUTPUT_MODES:
+        raise Exception(f"output must be one of {', '.join(OUTPUT_MODES)}")
+    return output == "projected" or bool(fields)
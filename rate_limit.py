@@ -0,0 +1,283 @@
+"""
+Rate-limit-aware request scheduling for the Braintrust GitHub tools
+
+GitHub meters each API resource separately: `core` (most REST calls),
+`search` (search-issues, search-repositories) and `graphql`, and meters each
+token on its own. The scheduler keeps one budget per (resource, token),
+refreshed from the `X-RateLimit-*` headers of every response.
+
+Requests go out unpaced while most of the budget is left. Once the
+remaining budget drops below GITHUB_TOOLS_PACE_BELOW of the limit, a token
+bucket spreads what is left over the time until it resets, so the budget
+is not burned in a burst and then waited out.
+
+When GitHub does push back (403/429), `retry_delay` decides how long to
+wait: `Retry-After` if given, the reset time for an exhausted primary
+limit, otherwise exponential backoff with jitter for secondary limits.
+The wait also applies to every other request on that resource and token,
+so concurrent sessions back off together instead of retrying in lockstep.
+
+Tuning (environment variables):
+- GITHUB_TOOLS_MAX_RATE_LIMIT_WAIT: longest wait in seconds before failing (default 60)
+- GITHUB_TOOLS_RATE_LIMIT_RETRIES: retries after a rate-limited response (default 3)
+- GITHUB_TOOLS_PACE_BELOW: fraction of the limit left at which pacing starts (default 0.1)
+"""
+
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+MAX_WAIT = float(os.getenv("GITHUB_TOOLS_MAX_RATE_LIMIT_WAIT", "60"))
+MAX_RETRIES = int(os.getenv("GITHUB_TOOLS_RATE_LIMIT_RETRIES", "3"))
+PACE_BELOW = float(os.getenv("GITHUB_TOOLS_PACE_BELOW", "0.1"))
+
+# Authenticated limits, used until the first response reports the real ones
+DEFAULT_LIMITS = {
+    "core": (5000, 3600),
+    "search": (30, 60),
+    "graphql": (5000, 3600),
+}
+
+# Requests allowed back to back once pacing has kicked in
+BURST = {"core": 20, "search": 5, "graphql": 10}
+
+# Base delay for secondary rate limit backoff, doubled per attempt
+SECONDARY_BACKOFF = 2.0
+
+# Budget key for requests sent without a token
+ANONYMOUS = "anonymous"
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request would have to wait longer than MAX_WAIT"""
+
+
+def resource_for_url(url: str) -> str:
+    """Name the rate limit resource a request URL is metered against"""
+
+    # Only the path: contents and tree paths can contain a search/ directory
+    path = urlparse(url).path
+    if path.startswith("/search/"):
+        return "search"
+    if path.endswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+class ResourceBudget:
+    """Remaining budget and token bucket for one rate limit resource"""
+
+    def __init__(self, name: str):
+        limit, window = DEFAULT_LIMITS.get(name, DEFAULT_LIMITS["core"])
+        self.name = name
+        self.window = window
+        self.limit = limit
+        self.remaining = limit
+        self.used = 0
+        self.reset_at = time.time() + window
+        self.burst = BURST.get(name, BURST["core"])
+        self.tokens = float(self.burst)
+        self.refilled_at = time.monotonic()
+        # Set after a 403/429 so every request on this resource waits
+        self.blocked_until = 0.0
+
+    def refill_rate(self) -> float:
+        """Tokens per second that spend the remaining budget evenly until reset"""
+
+        seconds_left = max(self.reset_at - time.time(), 1.0)
+        return max(self.remaining, 0) / seconds_left
+
+    def pacing(self) -> bool:
+        """Whether the remaining budget is low enough to spread until reset"""
+
+        return self.remaining < self.limit * PACE_BELOW
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait for it"""
+
+        # A new window has started since the last response we saw
+        if time.time() >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = time.time() + self.window
+
+        now = time.monotonic()
+        rate = self.refill_rate()
+        if self.pacing():
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * rate)
+            self.tokens -= 1
+        else:
+            # Plenty left: a full bucket for when pacing starts
+            self.tokens = float(self.burst)
+        self.refilled_at = now
+
+        wait = max(self.blocked_until - time.time(), 0.0)
+        if self.remaining <= 0 and self.reset_at > time.time():
+            wait = max(wait, self.reset_at - time.time())
+        elif self.tokens < 0:
+            wait = max(wait, -self.tokens / rate if rate > 0 else MAX_WAIT + 1)
+
+        # Count the request now so concurrent callers see it before GitHub does
+        self.remaining -= 1
+        return wait
+
+    def available_in(self) -> float:
+        """Seconds until this budget can send again without waiting for a reset"""
+
+        now = time.time()
+        wait = max(self.blocked_until - now, 0.0)
+        if self.remaining <= 0 and self.reset_at > now:
+            wait = max(wait, self.reset_at - now)
+        return wait
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "used": self.used,
+            "reset": int(self.reset_at),
+            "blocked_for": max(round(self.blocked_until - time.time(), 3), 0.0),
+        }
+
+
+class RateLimitScheduler:
+    """Tracks per-resource, per-token budgets and paces requests against them"""
+
+    def __init__(self):
+        self._budgets: dict[tuple, ResourceBudget] = {}
+        self._lock = threading.Lock()
+
+    def _budget(self, resource: str, token_id: str) -> ResourceBudget:
+        budget = self._budgets.get((resource, token_id))
+        if budget is None:
+            budget = self._budgets[(resource, token_id)] = ResourceBudget(resource)
+        return budget
+
+    def reserve(self, resource: str, token_id: str = ANONYMOUS) -> float:
+        """Reserve a request slot, returning the seconds to wait before sending.
+
+        Raises RateLimitExceeded instead of waiting longer than MAX_WAIT.
+        """
+
+        with self._lock:
+            budget = self._budget(resource, token_id)
+            wait = budget.reserve()
+            if wait > MAX_WAIT:
+                # Give the slot back, this request is not going to be sent
+                budget.tokens = min(budget.burst, budget.tokens + 1)
+                budget.remaining += 1
+                raise RateLimitExceeded(
+                    f"GitHub {resource} rate limit exhausted, "
+                    f"resets in {int(budget.reset_at - time.time())}s"
+                )
+        return wait
+
+    def observe(self, resource: str, headers, token_id: str = ANONYMOUS) -> None:
+        """Update a budget from a response's X-RateLimit-* headers"""
+
+        # GitHub names the resource it metered, prefer that over our guess
+        resource = headers.get("X-RateLimit-Resource", resource)
+        if "X-RateLimit-Remaining" not in headers:
+            return
+
+        with self._lock:
+            budget = self._budget(resource, token_id)
+            budget.limit = int(headers.get("X-RateLimit-Limit", budget.limit))
+            budget.remaining = int(headers["X-RateLimit-Remaining"])
+            budget.used = int(headers.get("X-RateLimit-Used", budget.used))
+            budget.reset_at = float(headers.get("X-RateLimit-Reset", budget.reset_at))
+
+    def retry_delay(
+        self,
+        resource: str,
+        status_code: int,
+        headers,
+        message: str,
+        attempt: int,
+        token_id: str = ANONYMOUS,
+    ) -> float | None:
+        """Seconds to wait before retrying a 403/429, or None if it is not a rate limit"""
+
+        if status_code not in (403, 429):
+            return None
+
+        retry_after = headers.get("Retry-After")
+        remaining = headers.get("X-RateLimit-Remaining")
+
+        if retry_after is not None:
+            delay = float(retry_after)
+        elif remaining == "0":
+            reset_at = float(headers.get("X-RateLimit-Reset", time.time()))
+            delay = max(reset_at - time.time(), 0.0) + 1
+        elif status_code == 429 or "rate limit" in message.lower():
+            # Secondary limit: no reset hint, back off exponentially
+            delay = SECONDARY_BACKOFF * (2**attempt)
+        else:
+            return None
+
+        # Jitter so waiting sessions don't all retry at the same instant
+        delay += random.uniform(0, min(delay, 1.0))
+
+        with self._lock:
+            budget = self._budget(headers.get("X-RateLimit-Resource", resource), token_id)
+            budget.blocked_until = max(budget.blocked_until, time.time() + delay)
+        return delay
+
+    def block(self, resource: str, token_id: str, seconds: float) -> None:
+        """Stop sending on a resource with a token for `seconds`"""
+
+        with self._lock:
+            budget = self._budget(resource, token_id)
+            budget.blocked_until = max(budget.blocked_until, time.time() + seconds)
+
+    def availability(self, resource: str, token_id: str) -> tuple[int, float]:
+        """(remaining budget, seconds until usable) for a resource and token"""
+
+        with self._lock:
+            budget = self._budget(resource, token_id)
+            return budget.remaining, budget.available_in()
+
+    def token_budgets(self, token_id: str) -> dict:
+        """Budget per resource for one token"""
+
+        with self._lock:
+            return {
+                resource: budget.snapshot()
+                for (resource, budget_token), budget in self._budgets.items()
+                if budget_token == token_id
+            }
+
+    def budgets(self) -> dict:
+        """Budget per resource, summed across tokens"""
+
+        with self._lock:
+            totals = {}
+            for (resource, _), budget in self._budgets.items():
+                snapshot = budget.snapshot()
+                total = totals.get(resource)
+                if total is None:
+                    totals[resource] = dict(snapshot, tokens=1)
+                    continue
+                total["limit"] += snapshot["limit"]
+                total["remaining"] += snapshot["remaining"]
+                total["used"] += snapshot["used"]
+                total["reset"] = min(total["reset"], snapshot["reset"])
+                total["blocked_for"] = min(total["blocked_for"], snapshot["blocked_for"])
+                total["tokens"] += 1
+            return totals
+
+
+_scheduler = RateLimitScheduler()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Return the process-wide rate limit scheduler"""
+
+    return _scheduler
+
+
+def get_rate_limit_budget() -> dict:
+    """Current budget per resource across all tokens, e.g. {"core": {"remaining": 4990, ...}}"""
+
+    return _scheduler.budgets()
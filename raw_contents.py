@@ -0,0 +1,296 @@
+"""
+Raw and ranged file reads for the Braintrust GitHub tools
+
+The contents API returns files base64-encoded inside JSON: a third larger
+on the wire, decoded whole in memory, and empty for files over 1 MB. Raw
+reads ask for the raw media type instead and stream the body into a
+bounded buffer, so at most `max_bytes` of a file is ever held.
+
+- Byte ranges are requested with a Range header and only the window is
+  read
+- Line ranges are cut while streaming: lines before the window are
+  discarded as they arrive and reading stops after the last line
+- When the file's blob SHA is known the read goes to the git blob API,
+  which is ref-independent, and is served from the blob cache when that
+  blob was fetched before. Files the contents API refuses as too large are
+  retried through the blob API as well
+
+Tuning (environment variables):
+- GITHUB_TOOLS_RAW_MAX_BYTES: default read buffer bound (default 1MB)
+"""
+
+import asyncio
+import base64
+import os
+from typing import AsyncIterator
+
+from blob_cache import blob_sha, get_blob_cache
+from github_client import GITHUB_API_URL, GitHubHTTPError, github_get_async, github_stream_async
+
+DEFAULT_RAW_MAX_BYTES = int(os.getenv("GITHUB_TOOLS_RAW_MAX_BYTES", str(1024 * 1024)))
+
+# Status codes the contents API answers with for files it won't serve
+_TOO_LARGE = (403, 413, 422)
+
+
+# Slice size when reading from memory or a memory-mapped file
+LOCAL_CHUNK_SIZE = 64 * 1024
+
+
+async def _chunks(data, start: int = 0) -> AsyncIterator[bytes]:
+    # Works on bytes, mmaps and memoryviews alike, copying one slice at a time
+    for offset in range(start, len(data), LOCAL_CHUNK_SIZE):
+        yield bytes(data[offset : offset + LOCAL_CHUNK_SIZE])
+
+
+async def _read_window(
+    chunks: AsyncIterator[bytes],
+    max_bytes: int,
+    length: int | None = None,
+    start_line: int | None = None,
+    end_line: int | None = None,
+) -> tuple[bytes, bool]:
+    """Buffer at most `max_bytes` of the requested window, as (data, truncated)"""
+
+    buffer = bytearray()
+    line = 1  # line number at the current stream position
+    truncated = False
+
+    async for chunk in chunks:
+        done = False
+
+        # Skip whole lines until the window starts
+        if start_line is not None and line < start_line:
+            position = 0
+            while line < start_line:
+                newline = chunk.find(b"\n", position)
+                if newline < 0:
+                    break
+                line += 1
+                position = newline + 1
+            if line < start_line:
+                continue
+            chunk = chunk[position:]
+
+        # Keep lines through the end of the window
+        if end_line is not None:
+            position = 0
+            while True:
+                newline = chunk.find(b"\n", position)
+                if newline < 0:
+                    break
+                if line >= end_line:
+                    chunk = chunk[: newline + 1]
+                    done = True
+                    break
+                line += 1
+                position = newline + 1
+
+        if length is not None and len(buffer) + len(chunk) >= length:
+            chunk = chunk[: length - len(buffer)]
+            done = True
+
+        room = max_bytes - len(buffer)
+        if len(chunk) > room:
+            buffer += chunk[:room]
+            truncated = True
+            break
+        buffer += chunk
+        if done:
+            break
+
+    return bytes(buffer), truncated
+
+
+async def _stream_window(url: str, params: dict | None, start: int, **window) -> tuple:
+    """Read a window of a raw response, as (data, truncated, total size or None)"""
+
+    try:
+        response = await github_stream_async(url, params=params, start=start)
+    except GitHubHTTPError as e:
+        if e.status_code == 416:
+            # Range starts past the end of the file
+            return b"", False, None
+        raise
+
+    try:
+        total = None
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+        elif response.status_code == 200:
+            total = response.headers.get("Content-Length")
+        total = int(total) if total and total.isdigit() else None
+
+        chunks = response.aiter_bytes()
+        if start and response.status_code != 206:
+            chunks = _skip(chunks, start)
+
+        data, truncated = await _read_window(chunks, **window)
+        return data, truncated, total
+    finally:
+        await response.aclose()
+
+
+async def _skip(chunks: AsyncIterator[bytes], count: int) -> AsyncIterator[bytes]:
+    """Drop the first `count` bytes of a stream, for servers that ignore Range"""
+
+    async for chunk in chunks:
+        if count >= len(chunk):
+            count -= len(chunk)
+            continue
+        yield chunk[count:]
+        count = 0
+
+
+async def _find_sha(owner: str, repo: str, ref: str | None, path: str) -> str | None:
+    """Look a file's blob SHA up in its parent directory listing"""
+
+    parent = path.rsplit("/", 1)[0] if "/" in path else ""
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{parent}"
+    listing = await github_get_async(url, params={"ref": ref} if ref else None)
+    if not isinstance(listing, list):
+        return None
+
+    get_blob_cache().remember(owner, repo, ref, listing)
+    for entry in listing:
+        if entry.get("path") == path:
+            return entry.get("sha")
+    return None
+
+
+def _decode(data: bytes) -> tuple[str, str]:
+    """(content, encoding): text as UTF-8, binary files as base64"""
+
+    if b"\0" in data:
+        return base64.b64encode(data).decode(), "base64"
+    return data.decode("utf-8", errors="replace"), "utf-8"
+
+
+def _window(
+    start_byte: int | None,
+    end_byte: int | None,
+    start_line: int | None,
+    end_line: int | None,
+    max_bytes: int | None,
+) -> tuple[int, dict]:
+    """Validate a read's range, as (first byte, `_read_window` arguments)"""
+
+    if (start_byte is not None or end_byte is not None) and (
+        start_line is not None or end_line is not None
+    ):
+        raise Exception("Use either a byte range or a line range, not both")
+
+    start = start_byte or 0
+    window = {
+        "max_bytes": max_bytes or DEFAULT_RAW_MAX_BYTES,
+        "length": end_byte - start if end_byte is not None else None,
+        "start_line": start_line,
+        "end_line": end_line,
+    }
+    if window["length"] is not None and window["length"] < 0:
+        raise Exception("end_byte must not be before start_byte")
+    return start, window
+
+
+def _result(path, ref, sha, total, data, truncated, source, start, start_line, end_line, ranged):
+    content, encoding = _decode(data)
+    result = {
+        "path": path,
+        "ref": ref,
+        "sha": sha,
+        "size": total,
+        "content": content,
+        "encoding": encoding,
+        "bytes_read": len(data),
+        "truncated": truncated,
+        "source": source,
+    }
+    if start_line is not None or end_line is not None:
+        result["start_line"] = start_line or 1
+        result["end_line"] = end_line
+    elif ranged:
+        result["start_byte"] = start
+        result["end_byte"] = start + len(data)
+    return result
+
+
+async def read_local_async(
+    data,
+    path: str,
+    ref: str | None,
+    sha: str | None,
+    source: str,
+    start_byte: int | None = None,
+    end_byte: int | None = None,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    max_bytes: int | None = None,
+) -> dict:
+    """Same as `read_raw_async`, for contents already in memory or memory-mapped"""
+
+    start, window = _window(start_byte, end_byte, start_line, end_line, max_bytes)
+    read, truncated = await _read_window(_chunks(data, start), **window)
+    ranged = start_byte is not None or end_byte is not None
+    return _result(
+        path.strip("/"), ref, sha, len(data), read, truncated, source, start, start_line, end_line, ranged
+    )
+
+
+async def read_raw_async(
+    owner: str,
+    repo: str,
+    path: str,
+    ref: str | None = None,
+    start_byte: int | None = None,
+    end_byte: int | None = None,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    max_bytes: int | None = None,
+) -> dict:
+    """Read a file, or a byte/line window of it, without base64 or JSON wrapping"""
+
+    path = path.strip("/")
+    start, window = _window(start_byte, end_byte, start_line, end_line, max_bytes)
+
+    cache = get_blob_cache()
+    entry = cache.lookup(owner, repo, ref, path)
+    sha = entry["sha"] if entry else None
+    whole_file = start == 0 and end_byte is None and start_line is None and end_line is None
+
+    # May read from the disk tier
+    cached = await asyncio.to_thread(cache.get, sha) if sha else None
+    if cached is not None:
+        return await read_local_async(
+            cached, path, ref, sha, "cache", start_byte, end_byte, start_line, end_line, max_bytes
+        )
+
+    if sha is None:
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{path}"
+        params = {"ref": ref} if ref else None
+        try:
+            data, truncated, total = await _stream_window(url, params, start, **window)
+            source = "contents"
+        except GitHubHTTPError as e:
+            if e.status_code not in _TOO_LARGE:
+                raise
+            sha = await _find_sha(owner, repo, ref, path)
+            if sha is None:
+                raise
+
+    if sha is not None:
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/blobs/{sha}"
+        data, truncated, total = await _stream_window(url, None, start, **window)
+        source = "blob"
+
+    # A complete read can be reused by any ref with the same blob
+    if whole_file and not truncated:
+        total = len(data)
+        sha = sha or blob_sha(data)
+        if await asyncio.to_thread(cache.put, sha, data):
+            name = path.rsplit("/", 1)[-1]
+            entry = {"name": name, "path": path, "sha": sha, "size": total, "type": "file"}
+            cache.remember(owner, repo, ref, [entry])
+
+    ranged = start_byte is not None or end_byte is not None
+    return _result(path, ref, sha, total, data, truncated, source, start, start_line, end_line, ranged)
@@ -5,19 +5,38 @@ This tool gets the contents of a repository directory or file.
 Useful for exploring repository structure and understanding codebases.
 """
 
-import os
+import base64
 from typing import List, Optional
 
-import braintrust
-import requests
 from pydantic import BaseModel
 
+from blob_cache import cached_file_async, contents_item, get_blob_cache, store_file_async
+from git_trees import filter_entries, list_tree_async, summarize
+from github_client import GITHUB_API_URL, github_get_async, sync_handler
+from raw_contents import read_local_async, read_raw_async
+from projection import project_response, wants_projection
+from response_cache import cached
+from snapshots import get_snapshot_store
+from tool_registry import lazy_tool
+
 
 class RepositoryContentsParams(BaseModel):
     owner: str
     repo: str
     path: Optional[str] = ""  # Default to root directory
     ref: Optional[str] = None  # Branch, tag, or commit SHA
+    output: Optional[str] = "raw"  # raw, projected (trimmed to the model fields)
+    fields: Optional[List[str]] = None  # only these fields, e.g. ["path", "type", "size"]
+    recursive: Optional[bool] = False  # whole tree under path in one call
+    pattern: Optional[str] = None  # glob on the full path, e.g. "src/*.py" (recursive only)
+    max_depth: Optional[int] = None  # levels below path to include (recursive only)
+    raw_content: Optional[bool] = False  # file content as text instead of base64 JSON
+    start_byte: Optional[int] = None  # first byte to read (raw_content only)
+    end_byte: Optional[int] = None  # stop before this byte (raw_content only)
+    start_line: Optional[int] = None  # first line to read, 1-based (raw_content only)
+    end_line: Optional[int] = None  # last line to read, inclusive (raw_content only)
+    max_bytes: Optional[int] = None  # read at most this many bytes (raw_content only)
+    snapshot: Optional[bool] = False  # download the repo once and read it locally
 
 
 class ContentItem(BaseModel):
@@ -34,55 +53,171 @@ class ContentItem(BaseModel):
     encoding: Optional[str] = None  # Usually "base64" for files
 
 
+class TreeEntry(BaseModel):
+    path: str
+    type: str  # "file", "dir" or "submodule"
+    sha: str
+    size: Optional[int]  # None for directories
+    mode: str
+
+
+class RepositoryTreeResponse(BaseModel):
+    repository: str
+    path: str
+    ref: Optional[str]
+    entries: List[TreeEntry]
+    summary: dict
+
+
 class RepositoryContentsResponse(BaseModel):
     contents: List[ContentItem]
     path: str
     repository: str
 
 
-def get_repository_contents_handler(
-    owner: str, repo: str, path: str = "", ref: str | None = None
+@cached("repository-contents")
+async def get_repository_contents_handler_async(
+    owner: str,
+    repo: str,
+    path: str = "",
+    ref: str | None = None,
+    output: str = "raw",
+    fields: List[str] | None = None,
+    recursive: bool = False,
+    pattern: str | None = None,
+    max_depth: int | None = None,
+    raw_content: bool = False,
+    start_byte: int | None = None,
+    end_byte: int | None = None,
+    start_line: int | None = None,
+    end_line: int | None = None,
+    max_bytes: int | None = None,
+    snapshot: bool = False,
 ):
     """Get repository contents using GitHub API"""
 
-    # Get GitHub token from environment
-    github_token = os.getenv("GITHUB_TOKEN")
+    projected = wants_projection(output, fields)
 
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "Braintrust-GitHub-Tools",
-    }
+    # Served locally when asked to, or when this commit was already downloaded
+    local = await get_snapshot_store().get(owner, repo, ref, create=snapshot)
+
+    if recursive:
+        return await _get_tree(owner, repo, path, ref, pattern, max_depth, fields, local)
+
+    if raw_content and local is not None:
+        entry = _snapshot_entry(local, owner, repo, path)
+        return await read_local_async(
+            local.read(path),
+            path,
+            ref,
+            entry["sha"],
+            "snapshot",
+            start_byte=start_byte,
+            end_byte=end_byte,
+            start_line=start_line,
+            end_line=end_line,
+            max_bytes=max_bytes,
+        )
 
-    if github_token:
-        headers["Authorization"] = f"Bearer {github_token}"
+    if raw_content:
+        return await read_raw_async(
+            owner,
+            repo,
+            path,
+            ref=ref,
+            start_byte=start_byte,
+            end_byte=end_byte,
+            start_line=start_line,
+            end_line=end_line,
+            max_bytes=max_bytes,
+        )
 
     # Build the API URL
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{path}"
 
     # Build query parameters
     query_params = {}
     if ref:
         query_params["ref"] = ref
 
-    try:
-        response = requests.get(url, headers=headers, params=query_params)
-        response.raise_for_status()
+    if local is not None:
+        contents = _snapshot_contents(local, owner, repo, path)
+    else:
+        # A file whose SHA at this ref is already known may be in the blob cache
+        contents = await cached_file_async(owner, repo, ref, path)
+    if contents is None:
+        contents = await github_get_async(url, params=query_params)
+
+        if isinstance(contents, list):
+            get_blob_cache().remember(owner, repo, ref, contents)
+        else:
+            await store_file_async(owner, repo, ref, contents)
+
+    # A list for directories, a single item for files
+    if projected:
+        return project_response(contents, ContentItem, fields)
+
+    # Return the raw JSON response
+    return contents
+
 
-        # Return the raw JSON response
-        return response.json()
+def _snapshot_entry(local, owner, repo, path) -> dict:
+    entry = local.entry(path)
+    if entry is None or entry["type"] == "dir":
+        raise Exception(f"{path} not found in {owner}/{repo} at {local.commit[:7]}")
+    return entry
 
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"GitHub API request failed: {str(e)}")
-    except KeyError as e:
-        raise Exception(f"Unexpected response format: {str(e)}")
 
+def _snapshot_contents(local, owner, repo, path):
+    """A contents API style response read from a snapshot, with URLs at its commit"""
 
-project = braintrust.projects.create(name="github-tools")
+    def item(entry: dict, entry_path: str) -> dict:
+        return contents_item(
+            owner, repo, local.commit, entry_path, entry["sha"], entry["size"], entry["type"]
+        )
 
-repository_contents = project.tools.create(
-    name="Get Repository Contents",
-    slug="repository-contents",
-    description="""
+    entry = local.entry(path) if path.strip("/") else {"type": "dir"}
+    if entry is None:
+        raise Exception(f"{path} not found in {owner}/{repo} at {local.commit[:7]}")
+
+    if entry["type"] == "dir":
+        return [item(child, child["path"]) for child in local.list(path)]
+
+    return {
+        **item(entry, path.strip("/")),
+        "content": base64.b64encode(local.read(path)).decode(),
+        "encoding": "base64",
+    }
+
+
+async def _get_tree(owner, repo, path, ref, pattern, max_depth, fields, local=None):
+    """Everything under `path` from the git trees API, plus a size summary"""
+
+    if local is not None:
+        entries, stats = local.tree(), {"requests": 0}
+    else:
+        entries, stats = await list_tree_async(
+            owner, repo, ref=ref, path=path, max_depth=max_depth
+        )
+        get_blob_cache().remember(owner, repo, ref, entries)
+    entries = filter_entries(entries, path=path, pattern=pattern, max_depth=max_depth)
+
+    return {
+        "repository": f"{owner}/{repo}",
+        "path": path,
+        "ref": ref,
+        # Summarize before `fields` can drop the sizes
+        "summary": dict(summarize(entries), requests=stats["requests"]),
+        "entries": project_response(entries, TreeEntry, fields) if fields else entries,
+    }
+
+
+get_repository_contents_handler = sync_handler(get_repository_contents_handler_async)
+
+TOOL = {
+    "name": "Get Repository Contents",
+    "slug": "repository-contents",
+    "description": """
     Get the contents of a repository directory or file.
     
     Use this tool to:
@@ -98,10 +233,37 @@ repository_contents = project.tools.create(
     For files, content is returned base64-encoded.
     For directories, returns list of items in that directory.
     
+    Recursive listing (one call for a whole tree):
+    - recursive: return every file and folder under path, with a summary
+      of file counts and sizes by extension and the largest files
+    - pattern: glob on the full path, e.g. "*.py" or "docs/*.md"
+    - max_depth: levels below path to include (1 = direct children)
+    
+    Raw file reads (for large files or partial views):
+    - raw_content: return the file as text (base64 only for binary files),
+      streamed without the JSON/base64 overhead; works past the 1 MB
+      limit of the default mode
+    - start_byte / end_byte: read only this byte range (end exclusive)
+    - start_line / end_line: read only these lines (1-based, inclusive)
+    - max_bytes: read at most this many bytes (default 1 MB); the result
+      says whether it was truncated
+    
+    Snapshots (for browsing many files at one ref):
+    - snapshot: download the repository once for this ref and answer this
+      and later calls for the same commit locally, including recursive
+      listings and raw reads
+    
+    Output options:
+    - output: "raw" (full GitHub JSON) or "projected" (only ContentItem model fields)
+    - fields: keep only these fields, e.g. ["path", "type", "size"]
+      (for recursive listings, fields of each entry)
+    
     This helps understand what tools or approaches might be needed
     for further analysis of the codebase.
     """,
-    handler=get_repository_contents_handler,
-    parameters=RepositoryContentsParams,
-    if_exists="replace",
-)
+    "handler": get_repository_contents_handler,
+    "parameters": RepositoryContentsParams,
+}
+
+# Registered with Braintrust on first access to `repository_contents`, see tool_registry.py
+__getattr__ = lazy_tool("repository_contents", TOOL)
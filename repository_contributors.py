@@ -5,13 +5,21 @@ This tool gets the list of contributors to a repository.
 Useful for understanding project community and activity.
 """
 
-import os
 from typing import List, Optional
 
-import braintrust
-import requests
 from pydantic import BaseModel
 
+from github_client import (
+    GITHUB_API_URL,
+    MAX_PER_PAGE,
+    fetch_items_async,
+    github_get_async,
+    sync_handler,
+)
+from projection import project_response, wants_projection
+from response_cache import cached
+from tool_registry import lazy_tool
+
 
 class RepositoryContributorsParams(BaseModel):
     owner: str
@@ -19,6 +27,10 @@ class RepositoryContributorsParams(BaseModel):
     anon: Optional[bool] = False  # Include anonymous contributors
     per_page: Optional[int] = 30  # max 100
     page: Optional[int] = 1
+    all_pages: Optional[bool] = False  # follow pagination and return every page
+    max_items: Optional[int] = None  # stop paginating after this many contributors
+    output: Optional[str] = "raw"  # raw, projected (trimmed to the model fields)
+    fields: Optional[List[str]] = None  # only these fields, e.g. ["login", "contributions"]
 
 
 class Contributor(BaseModel):
@@ -44,24 +56,24 @@ class RepositoryContributorsResponse(BaseModel):
     repository: str
 
 
-def get_repository_contributors_handler(
-    owner: str, repo: str, anon: bool = False, per_page: int = 30, page: int = 1
+@cached("repository-contributors")
+async def get_repository_contributors_handler_async(
+    owner: str,
+    repo: str,
+    anon: bool = False,
+    per_page: int = 30,
+    page: int = 1,
+    all_pages: bool = False,
+    max_items: int | None = None,
+    output: str = "raw",
+    fields: List[str] | None = None,
 ):
     """Get repository contributors using GitHub API"""
 
-    # Get GitHub token from environment
-    github_token = os.getenv("GITHUB_TOKEN")
-
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "Braintrust-GitHub-Tools",
-    }
-
-    if github_token:
-        headers["Authorization"] = f"Bearer {github_token}"
+    projected = wants_projection(output, fields)
 
     # Build the API URL
-    url = f"https://api.github.com/repos/{owner}/{repo}/contributors"
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contributors"
 
     # Build query parameters
     query_params = {"per_page": per_page, "page": page}
@@ -69,25 +81,28 @@ def get_repository_contributors_handler(
     if anon:
         query_params["anon"] = 1
 
-    try:
-        response = requests.get(url, headers=headers, params=query_params)
-        response.raise_for_status()
+    # Walk the pages internally so one tool call replaces many
+    if all_pages or max_items:
+        query_params.update(per_page=MAX_PER_PAGE, page=1)
+        contributors = await fetch_items_async(
+            url, params=query_params, max_items=max_items
+        )
+    else:
+        contributors = await github_get_async(url, params=query_params)
 
-        # Return the raw JSON response
-        return response.json()
+    if projected:
+        return project_response(contributors, Contributor, fields)
 
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"GitHub API request failed: {str(e)}")
-    except KeyError as e:
-        raise Exception(f"Unexpected response format: {str(e)}")
+    # Return the raw JSON response
+    return contributors
 
 
-project = braintrust.projects.create(name="github-tools")
+get_repository_contributors_handler = sync_handler(get_repository_contributors_handler_async)
 
-repository_contributors = project.tools.create(
-    name="Get Repository Contributors",
-    slug="repository-contributors",
-    description="""
+TOOL = {
+    "name": "Get Repository Contributors",
+    "slug": "repository-contributors",
+    "description": """
     Get the list of contributors to a GitHub repository.
     
     Use this tool to:
@@ -101,13 +116,23 @@ repository_contributors = project.tools.create(
     - Number of contributions per person
     - Both registered users and anonymous contributors
     
+    Set all_pages to fetch every contributor in one call, or max_items
+    to cap how many are returned across pages. Either starts from the
+    first contributor; page and per_page are ignored.
+    
+    Output options:
+    - output: "raw" (full GitHub JSON) or "projected" (only Contributor model fields)
+    - fields: keep only these fields, e.g. ["login", "contributions"]
+    
     This information helps evaluate:
     - Project sustainability
     - Community engagement
     - Expertise levels
     - Potential collaboration opportunities
     """,
-    handler=get_repository_contributors_handler,
-    parameters=RepositoryContributorsParams,
-    if_exists="replace",
-)
+    "handler": get_repository_contributors_handler,
+    "parameters": RepositoryContributorsParams,
+}
+
+# Registered with Braintrust on first access to `repository_contributors`, see tool_registry.py
+__getattr__ = lazy_tool("repository_contributors", TOOL)
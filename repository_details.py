@@ -5,17 +5,21 @@ This tool gets detailed information about a specific GitHub repository.
 Takes owner/repo from search results or direct input.
 """
 
-import os
 from typing import List, Optional
 
-import braintrust
-import requests
 from pydantic import BaseModel
 
+from github_client import GITHUB_API_URL, github_get_async, sync_handler
+from projection import project_response, wants_projection
+from response_cache import cached
+from tool_registry import lazy_tool
+
 
 class RepositoryDetailsParams(BaseModel):
     owner: str
     repo: str
+    output: Optional[str] = "raw"  # raw, projected (trimmed to the model fields)
+    fields: Optional[List[str]] = None  # only these fields, e.g. ["full_name", "owner.login"]
 
 
 class RepositoryDetails(BaseModel):
@@ -50,42 +54,32 @@ class RepositoryDetails(BaseModel):
     permissions: Optional[dict]
 
 
-def get_repository_details_handler(owner: str, repo: str):
+@cached("repository-details")
+async def get_repository_details_handler_async(
+    owner: str, repo: str, output: str = "raw", fields: List[str] | None = None
+):
     """Get detailed repository information using GitHub API"""
 
-    # Get GitHub token from environment
-    github_token = os.getenv("GITHUB_TOKEN")
-
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "Braintrust-GitHub-Tools",
-    }
-
-    if github_token:
-        headers["Authorization"] = f"Bearer {github_token}"
+    projected = wants_projection(output, fields)
 
     # Build the API URL
-    url = f"https://api.github.com/repos/{owner}/{repo}"
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}"
 
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+    details = await github_get_async(url, hedge=True)
 
-        # Return the raw JSON response
-        return response.json()
+    if projected:
+        return project_response(details, RepositoryDetails, fields)
 
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"GitHub API request failed: {str(e)}")
-    except KeyError as e:
-        raise Exception(f"Unexpected response format: {str(e)}")
+    # Return the raw JSON response
+    return details
 
 
-project = braintrust.projects.create(name="github-tools")
+get_repository_details_handler = sync_handler(get_repository_details_handler_async)
 
-repository_details = project.tools.create(
-    name="Get Repository Details",
-    slug="repository-details",
-    description="""
+TOOL = {
+    "name": "Get Repository Details",
+    "slug": "repository-details",
+    "description": """
     Get detailed information about a specific GitHub repository.
     
     Use this tool with repository owner and name from search results
@@ -98,10 +92,16 @@ repository_details = project.tools.create(
     - Permission details
     - Topics and description
     
+    Output options:
+    - output: "raw" (full GitHub JSON) or "projected" (only RepositoryDetails model fields)
+    - fields: keep only these fields, e.g. ["full_name", "stargazers_count", "license"]
+    
     This information can be used to determine which other tools to use
     (e.g., if open_issues_count > 0, use list-issues tool).
     """,
-    handler=get_repository_details_handler,
-    parameters=RepositoryDetailsParams,
-    if_exists="replace",
-)
+    "handler": get_repository_details_handler,
+    "parameters": RepositoryDetailsParams,
+}
+
+# Registered with Braintrust on first access to `repository_details`, see tool_registry.py
+__getattr__ = lazy_tool("repository_details", TOOL)
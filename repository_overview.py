@@ -0,0 +1,487 @@
+"""
+GitHub Repository Overview Tool for Braintrust
+
+This tool gets a repository's details, recent issues, recent pull requests
+and top contributors in one call. Several repositories can be requested at
+once.
+
+With the default GraphQL backend, details, issues and pull requests for every
+requested repository come back from a single aliased GraphQL query instead
+of separate REST calls per repository. The results are mapped back to the
+same shapes the REST tools return (`RepositoryDetails`, `Issue`,
+`PullRequest`). GraphQL has no contributors connection, so contributors are
+fetched over REST concurrently with the query.
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from github_client import (
+    GITHUB_API_URL,
+    MAX_PER_PAGE,
+    gather_limited,
+    github_graphql_async,
+    iter_items_async,
+    sync_handler,
+)
+from list_pull_requests import list_pull_requests_handler_async
+from repository_contributors import get_repository_contributors_handler_async
+from repository_details import get_repository_details_handler_async
+from response_cache import cached
+from token_pool import get_token_pool
+from tool_registry import lazy_tool
+
+MAX_REPOSITORIES = 10
+
+
+class RepositoryOverviewParams(BaseModel):
+    repositories: List[str]  # "owner/repo" pairs, max 10
+    issues: Optional[int] = 10  # most recent open issues per repo, max 100
+    pull_requests: Optional[int] = 10  # most recent open PRs per repo, max 100
+    contributors: Optional[int] = 10  # top contributors per repo, max 100
+    backend: Optional[str] = "graphql"  # graphql, rest
+
+
+_ACTOR_FIELDS = """
+    login avatarUrl url
+    ... on User { databaseId }
+    ... on Organization { databaseId }
+    ... on Bot { databaseId }
+    ... on Mannequin { databaseId }
+"""
+
+_QUERY_FRAGMENTS = f"""
+fragment ActorFields on Actor {{ {_ACTOR_FIELDS} }}
+
+fragment OwnerFields on RepositoryOwner {{
+    __typename login avatarUrl url
+    ... on User {{ databaseId }}
+    ... on Organization {{ databaseId }}
+}}
+
+fragment RepositoryFields on Repository {{
+    databaseId name nameWithOwner description url sshUrl homepageUrl
+    diskUsage stargazerCount forkCount isArchived isDisabled forkingAllowed
+    isTemplate webCommitSignoffRequired visibility viewerPermission
+    createdAt updatedAt pushedAt
+    owner {{ ...OwnerFields }}
+    primaryLanguage {{ name }}
+    licenseInfo {{ key name spdxId url }}
+    defaultBranchRef {{ name }}
+    repositoryTopics(first: 20) {{ nodes {{ topic {{ name }} }} }}
+    openIssues: issues(states: OPEN) {{ totalCount }}
+    openPullRequests: pullRequests(states: OPEN) {{ totalCount }}
+}}
+
+fragment IssueFields on Issue {{
+    databaseId number title state body url createdAt updatedAt closedAt
+    author {{ ...ActorFields }}
+    labels(first: 20) {{ nodes {{ name color description }} }}
+    assignees(first: 10) {{ nodes {{ login avatarUrl url databaseId }} }}
+    milestone {{ number title state url }}
+    comments {{ totalCount }}
+}}
+
+fragment PullRequestFields on PullRequest {{
+    databaseId number title state body url createdAt updatedAt closedAt
+    mergedAt locked isDraft maintainerCanModify additions deletions changedFiles
+    author {{ ...ActorFields }}
+    labels(first: 20) {{ nodes {{ name color description }} }}
+    assignees(first: 10) {{ nodes {{ login avatarUrl url databaseId }} }}
+    milestone {{ number title state url }}
+    comments {{ totalCount }}
+    reviewThreads {{ totalCount }}
+    commits {{ totalCount }}
+    mergeCommit {{ oid }}
+    headRefName headRefOid
+    headRepositoryOwner {{ ...OwnerFields }}
+    headRepository {{ nameWithOwner }}
+    baseRefName baseRefOid
+    baseRepository {{ nameWithOwner owner {{ ...OwnerFields }} }}
+}}
+"""
+
+# Shown by the REST API for deleted accounts
+_GHOST_USER = {
+    "login": "ghost",
+    "id": 10137,
+    "avatar_url": "https://avatars.githubusercontent.com/u/10137?v=4",
+    "html_url": "https://github.com/ghost",
+}
+
+_PERMISSIONS = ["pull", "triage", "push", "maintain", "admin"]
+_VIEWER_PERMISSION_LEVELS = {"READ": 1, "TRIAGE": 2, "WRITE": 3, "MAINTAIN": 4, "ADMIN": 5}
+
+
+def build_overview_query(count: int) -> str:
+    """Build one query that aliases a repository lookup per requested repo"""
+
+    variables = ", ".join(
+        f"$owner{i}: String!, $name{i}: String!" for i in range(count)
+    )
+    repositories = "\n".join(
+        f"""
+    r{i}: repository(owner: $owner{i}, name: $name{i}) {{
+        ...RepositoryFields
+        recentIssues: issues(first: $issues, states: OPEN, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+            nodes {{ ...IssueFields }}
+        }}
+        recentPullRequests: pullRequests(first: $pullRequests, states: OPEN, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+            nodes {{ ...PullRequestFields }}
+        }}
+    }}"""
+        for i in range(count)
+    )
+    return (
+        f"query RepositoryOverview({variables}, $issues: Int!, $pullRequests: Int!) {{"
+        f"{repositories}\n}}\n{_QUERY_FRAGMENTS}"
+    )
+
+
+def _user(actor: dict | None) -> dict:
+    if actor is None:
+        return dict(_GHOST_USER)
+    return {
+        "login": actor["login"],
+        "id": actor.get("databaseId"),
+        "avatar_url": actor["avatarUrl"],
+        "html_url": actor["url"],
+    }
+
+
+def _labels(node: dict) -> list:
+    # GraphQL does not expose numeric label ids
+    return [
+        {
+            "id": None,
+            "name": label["name"],
+            "color": label["color"],
+            "description": label["description"],
+        }
+        for label in node["labels"]["nodes"]
+    ]
+
+
+def _milestone(milestone: dict | None) -> dict | None:
+    if milestone is None:
+        return None
+    return {
+        "number": milestone["number"],
+        "title": milestone["title"],
+        "state": milestone["state"].lower(),
+        "html_url": milestone["url"],
+    }
+
+
+def _repository_details(node: dict) -> dict:
+    """Map a GraphQL repository node to the `RepositoryDetails` shape"""
+
+    owner = node["owner"]
+    full_name = node["nameWithOwner"]
+    license_info = node["licenseInfo"]
+    level = _VIEWER_PERMISSION_LEVELS.get(node["viewerPermission"] or "", 0)
+
+    return {
+        "id": node["databaseId"],
+        "name": node["name"],
+        "full_name": full_name,
+        "owner": {
+            "login": owner["login"],
+            "id": owner.get("databaseId"),
+            "avatar_url": owner["avatarUrl"],
+            "html_url": owner["url"],
+            "type": owner["__typename"],
+        },
+        "description": node["description"],
+        "html_url": node["url"],
+        "clone_url": f"{node['url']}.git",
+        "ssh_url": node["sshUrl"],
+        "git_url": f"git://github.com/{full_name}.git",
+        "homepage": node["homepageUrl"],
+        "size": node["diskUsage"] or 0,
+        "stargazers_count": node["stargazerCount"],
+        # The REST API reports stargazers as watchers_count too
+        "watchers_count": node["stargazerCount"],
+        "forks_count": node["forkCount"],
+        "language": (node["primaryLanguage"] or {}).get("name"),
+        "topics": [t["topic"]["name"] for t in node["repositoryTopics"]["nodes"]],
+        "archived": node["isArchived"],
+        "disabled": node["isDisabled"],
+        # REST counts open pull requests as open issues
+        "open_issues_count": node["openIssues"]["totalCount"]
+        + node["openPullRequests"]["totalCount"],
+        "license": license_info
+        and {
+            "key": license_info["key"],
+            "name": license_info["name"],
+            "spdx_id": license_info["spdxId"],
+            "url": license_info["url"],
+        },
+        "allow_forking": node["forkingAllowed"],
+        "is_template": node["isTemplate"],
+        "web_commit_signoff_required": node["webCommitSignoffRequired"],
+        "visibility": node["visibility"].lower(),
+        "default_branch": (node["defaultBranchRef"] or {}).get("name", ""),
+        "created_at": node["createdAt"],
+        "updated_at": node["updatedAt"],
+        "pushed_at": node["pushedAt"],
+        "permissions": {
+            permission: level > rank for rank, permission in enumerate(_PERMISSIONS)
+        },
+    }
+
+
+def _issue(node: dict) -> dict:
+    """Map a GraphQL issue node to the `Issue` shape"""
+
+    assignees = [_user(assignee) for assignee in node["assignees"]["nodes"]]
+    return {
+        "id": node["databaseId"],
+        "number": node["number"],
+        "title": node["title"],
+        "user": _user(node["author"]),
+        "labels": _labels(node),
+        "state": node["state"].lower(),
+        "assignee": assignees[0] if assignees else None,
+        "assignees": assignees,
+        "milestone": _milestone(node["milestone"]),
+        "comments": node["comments"]["totalCount"],
+        "created_at": node["createdAt"],
+        "updated_at": node["updatedAt"],
+        "closed_at": node["closedAt"],
+        "body": node["body"],
+        "html_url": node["url"],
+        "pull_request": None,
+    }
+
+
+def _branch(ref: str, sha: str, owner: dict | None, repository: dict | None) -> dict:
+    user = _user(owner)
+    return {
+        "label": f"{user['login']}:{ref}",
+        "ref": ref,
+        "sha": sha,
+        "user": user,
+        "repo": repository and {"full_name": repository["nameWithOwner"]},
+    }
+
+
+def _pull_request(node: dict) -> dict:
+    """Map a GraphQL pull request node to the `PullRequest` shape"""
+
+    assignees = [_user(assignee) for assignee in node["assignees"]["nodes"]]
+    base_repository = node["baseRepository"]
+    return {
+        "id": node["databaseId"],
+        "number": node["number"],
+        "title": node["title"],
+        "user": _user(node["author"]),
+        "labels": _labels(node),
+        # REST reports merged pull requests as closed
+        "state": "open" if node["state"] == "OPEN" else "closed",
+        "locked": node["locked"],
+        "assignee": assignees[0] if assignees else None,
+        "assignees": assignees,
+        "milestone": _milestone(node["milestone"]),
+        "comments": node["comments"]["totalCount"],
+        # Closest GraphQL equivalent of REST's review comment count
+        "review_comments": node["reviewThreads"]["totalCount"],
+        "maintainer_can_modify": node["maintainerCanModify"],
+        "commits": node["commits"]["totalCount"],
+        "additions": node["additions"],
+        "deletions": node["deletions"],
+        "changed_files": node["changedFiles"],
+        "created_at": node["createdAt"],
+        "updated_at": node["updatedAt"],
+        "closed_at": node["closedAt"],
+        "merged_at": node["mergedAt"],
+        "merge_commit_sha": (node["mergeCommit"] or {}).get("oid"),
+        "draft": node["isDraft"],
+        "head": _branch(
+            node["headRefName"],
+            node["headRefOid"],
+            node["headRepositoryOwner"],
+            node["headRepository"],
+        ),
+        "base": _branch(
+            node["baseRefName"],
+            node["baseRefOid"],
+            base_repository and base_repository["owner"],
+            base_repository,
+        ),
+        "body": node["body"],
+        "html_url": node["url"],
+        "diff_url": f"{node['url']}.diff",
+        "patch_url": f"{node['url']}.patch",
+    }
+
+
+async def _graphql_overview(repositories: list, issues: int, pull_requests: int) -> list:
+    variables = {"issues": issues, "pullRequests": pull_requests}
+    for i, (owner, repo) in enumerate(repositories):
+        variables[f"owner{i}"] = owner
+        variables[f"name{i}"] = repo
+
+    data = await github_graphql_async(build_overview_query(len(repositories)), variables)
+
+    overviews = []
+    for i, (owner, repo) in enumerate(repositories):
+        node = data.get(f"r{i}")
+        if node is None:
+            overviews.append({"error": f"Repository {owner}/{repo} not found"})
+            continue
+        overviews.append(
+            {
+                "details": _repository_details(node),
+                "issues": [_issue(n) for n in node["recentIssues"]["nodes"]],
+                "pull_requests": [
+                    _pull_request(n) for n in node["recentPullRequests"]["nodes"]
+                ],
+            }
+        )
+    return overviews
+
+
+async def _rest_issues(owner: str, repo: str, count: int) -> list:
+    """Walk the newest open issues until `count` that are not pull requests are found"""
+
+    if count <= 0:
+        return []
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues"
+    params = {"state": "open", "sort": "created", "direction": "desc", "per_page": MAX_PER_PAGE}
+    issues = []
+    # The issues endpoint also lists pull requests, so a page can hold fewer issues than asked for
+    async for item in iter_items_async(url, params=params):
+        if not item.get("pull_request"):
+            issues.append(item)
+            if len(issues) >= count:
+                break
+    return issues
+
+
+async def _rest_overview(owner: str, repo: str, issues: int, pull_requests: int) -> dict:
+    try:
+        details, issue_items, pull_request_items = await gather_limited(
+            [
+                get_repository_details_handler_async(owner, repo),
+                _rest_issues(owner, repo, issues),
+                # Enriched to carry commits, additions, deletions and changed_files like GraphQL
+                list_pull_requests_handler_async(
+                    owner, repo, per_page=max(pull_requests, 1), enrich=pull_requests > 0
+                ),
+            ],
+            3,
+        )
+    except Exception as e:
+        return {"error": str(e)}
+
+    return {
+        "details": details,
+        "issues": issue_items,
+        "pull_requests": pull_request_items[:pull_requests],
+    }
+
+
+async def _contributors(owner: str, repo: str, count: int) -> dict:
+    if count <= 0:
+        return {"contributors": []}
+    try:
+        contributors = await get_repository_contributors_handler_async(
+            owner, repo, per_page=min(count, 100)
+        )
+    except Exception as e:
+        # Reported apart from the overview, so a failed lookup is not mistaken for no contributors
+        return {"contributors_error": str(e)}
+    return {"contributors": contributors}
+
+
+@cached("repository-overview")
+async def repository_overview_handler_async(
+    repositories: List[str],
+    issues: int = 10,
+    pull_requests: int = 10,
+    contributors: int = 10,
+    backend: str = "graphql",
+):
+    """Get details, recent issues/PRs and contributors for repositories"""
+
+    issues = max(0, min(issues, 100))
+    pull_requests = max(0, min(pull_requests, 100))
+    contributors = max(0, min(contributors, 100))
+
+    if len(repositories) > MAX_REPOSITORIES:
+        raise Exception(f"At most {MAX_REPOSITORIES} repositories per call")
+
+    # GraphQL cannot be used anonymously
+    if backend == "graphql" and not get_token_pool():
+        backend = "rest"
+
+    parsed = []
+    for full_name in repositories:
+        owner, _, repo = full_name.strip().partition("/")
+        if not owner or not repo or "/" in repo:
+            raise Exception(f"Expected repository as 'owner/repo', got {full_name!r}")
+        parsed.append((owner, repo))
+
+    contributor_lookups = gather_limited(
+        (_contributors(owner, repo, contributors) for owner, repo in parsed),
+        MAX_REPOSITORIES,
+    )
+
+    if backend == "graphql":
+        overviews, contributor_results = await gather_limited(
+            [_graphql_overview(parsed, issues, pull_requests), contributor_lookups], 2
+        )
+    else:
+        rest_overviews = gather_limited(
+            (_rest_overview(o, r, issues, pull_requests) for o, r in parsed),
+            MAX_REPOSITORIES,
+        )
+        overviews, contributor_results = await gather_limited(
+            [rest_overviews, contributor_lookups], 2
+        )
+
+    results = []
+    for (owner, repo), overview, contributor_result in zip(
+        parsed, overviews, contributor_results
+    ):
+        result = {"repository": f"{owner}/{repo}", **overview}
+        if "error" not in overview:
+            result.update(contributor_result)
+        results.append(result)
+
+    return {"repositories": results, "backend": backend}
+
+
+repository_overview_handler = sync_handler(repository_overview_handler_async)
+
+TOOL = {
+    "name": "Get Repository Overview",
+    "slug": "repository-overview",
+    "description": """
+    Get a complete overview of one or more GitHub repositories in one call.
+
+    For each repository, returns:
+    - details: the same information repository-details returns
+    - issues: the most recent open issues
+    - pull_requests: the most recent open pull requests, including
+      commits, additions, deletions and changed_files
+    - contributors: the top contributors, or contributors_error if they
+      could not be fetched
+
+    Use this instead of calling repository-details, list-issues,
+    list-pull-requests and repository-contributors separately.
+
+    Parameters:
+    - repositories: list of "owner/repo" strings (max 10)
+    - issues / pull_requests / contributors: how many of each to include
+    - backend: "graphql" (one round trip, requires GITHUB_TOKEN) or "rest"
+      (one extra request per pull request for its commit and diff counts)
+    """,
+    "handler": repository_overview_handler,
+    "parameters": RepositoryOverviewParams,
+}
+
+# Registered with Braintrust on first access to `repository_overview`, see tool_registry.py
+__getattr__ = lazy_tool("repository_overview", TOOL)
@@ -0,0 +1,209 @@
+"""
+In-process response cache for the Braintrust GitHub tools
+
+Agents tend to ask for the same repository, user or contributor list many
+times within one conversation. Handlers decorated with `@cached(slug)` are
+answered from a bounded in-memory cache before any HTTP request is made.
+
+- LRU eviction, bounded by both entry count and total (JSON-encoded) bytes
+- Per-tool TTLs, see TOOL_TTLS
+- Hit/miss/eviction counters via `get_response_cache().stats()`
+- Keys are normalized: arguments are bound against the handler signature
+  with defaults applied, so `state` omitted and `state="open"` hit the same
+  entry, and owner/repo/username are compared case-insensitively
+
+Tuning (environment variables):
+- GITHUB_TOOLS_CACHE_MAX_ENTRIES: maximum cached responses (default 1024)
+- GITHUB_TOOLS_CACHE_MAX_BYTES: maximum cached payload bytes (default 64MB)
+- GITHUB_TOOLS_CACHE_DISABLED: set to "1" to bypass the cache entirely
+
+When GITHUB_TOOLS_CACHE_PATH is set, a shared SQLite tier (`sqlite_cache.py`)
+backs the in-memory cache so other worker processes start warm.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_cache import get_disk_cache
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("GITHUB_TOOLS_CACHE_MAX_ENTRIES", "1024"))
+DEFAULT_MAX_BYTES = int(os.getenv("GITHUB_TOOLS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_TTL = 60
+
+# Seconds a response stays fresh, per tool slug
+TOOL_TTLS = {
+    "user-info": 3600,
+    "repository-contributors": 900,
+    "repository-details": 300,
+    "repository-overview": 120,
+    "repository-contents": 300,
+    "code-search": 300,
+    "search-repositories": 120,
+    "search-issues": 60,
+    "list-pull-requests": 30,
+    "list-issues": 30,
+}
+
+# GitHub treats these as case-insensitive
+_CASE_INSENSITIVE_PARAMS = {"owner", "repo", "username"}
+
+
+class ResponseCache:
+    """Thread-safe TTL + LRU cache bounded by entry count and total bytes"""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: dict | None = None,
+        default_ttl: float = DEFAULT_TTL,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(TOOL_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+
+        # key -> (expires_at, size, value), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, tool: str) -> float:
+        return self.ttls.get(tool, self.default_ttl)
+
+    def get(self, key: str):
+        """Return (True, value) for a fresh entry, otherwise (False, None)"""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, size, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, tool: str, key: str, value, ttl: float | None = None):
+        """Store a response under the tool's TTL, evicting LRU entries as needed"""
+
+        if ttl is None:
+            ttl = self.ttl_for(tool)
+
+        size = len(json.dumps(value, separators=(",", ":"), default=str))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+_cache = ResponseCache()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache"""
+
+    return _cache
+
+
+def make_cache_key(tool: str, signature: inspect.Signature, args, kwargs) -> str:
+    """Build a normalized key from a handler call"""
+
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+
+    params = {}
+    for name, value in bound.arguments.items():
+        if name in _CASE_INSENSITIVE_PARAMS and isinstance(value, str):
+            value = value.lower()
+        params[name] = value
+
+    return tool + ":" + json.dumps(params, sort_keys=True, default=str)
+
+
+def cached(tool: str, cache_if=None):
+    """Decorator that serves an async handler's responses from the shared cache.
+
+    `cache_if`, when given, is called with each response and keeps it out of
+    the cache when it returns False, e.g. for partial results.
+    """
+
+    def decorator(handler):
+        signature = inspect.signature(handler)
+
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            if os.getenv("GITHUB_TOOLS_CACHE_DISABLED") == "1":
+                return await handler(*args, **kwargs)
+
+            key = make_cache_key(tool, signature, args, kwargs)
+            hit, value = _cache.get(key)
+            if hit:
+                return value
+
+            # Fall through to the shared on-disk tier, keeping its expiry
+            disk = get_disk_cache()
+            if disk is not None:
+                hit, value, expires_at = await asyncio.to_thread(disk.get, key)
+                if hit:
+                    _cache.set(tool, key, value, ttl=expires_at - time.time())
+                    return value
+
+            value = await handler(*args, **kwargs)
+            if cache_if is not None and not cache_if(value):
+                return value
+            _cache.set(tool, key, value)
+            if disk is not None:
+                await asyncio.to_thread(disk.set, tool, key, value, _cache.ttl_for(tool))
+            return value
+
+        return wrapper
+
+    return decorator
@@ -5,13 +5,18 @@ This tool searches for issues across GitHub repositories.
 More powerful than listing issues from a single repo.
 """
 
-import os
 from typing import List, Optional
 
-import braintrust
-import requests
 from pydantic import BaseModel
 
+from github_client import GITHUB_API_URL, github_get_async, sync_handler
+from issue_index import get_issue_index
+from output_budget import collect_within_budget, single_page
+from projection import project_response, wants_projection
+from response_cache import cached
+from search_shards import DEFAULT_MAX_ITEMS, search_sharded_async
+from tool_registry import lazy_tool
+
 
 class SearchIssuesParams(BaseModel):
     query: str
@@ -19,6 +24,12 @@ class SearchIssuesParams(BaseModel):
     order: Optional[str] = "desc"  # asc, desc
     per_page: Optional[int] = 30  # max 100
     page: Optional[int] = 1
+    output: Optional[str] = "raw"  # raw, projected (trimmed to the model fields)
+    fields: Optional[List[str]] = None  # only these item fields, e.g. ["number", "user.login"]
+    max_output_bytes: Optional[int] = None  # truncate bodies and drop fields to fit
+    local: Optional[bool] = True  # answer from the local index for synced repositories
+    shard: Optional[bool] = False  # split by created date to get past the 1000-result cap
+    max_items: Optional[int] = None  # results to return when sharding (default 2000)
 
 
 class SearchIssueUser(BaseModel):
@@ -62,28 +73,26 @@ class SearchIssuesResponse(BaseModel):
     items: List[SearchIssue]
 
 
-def search_issues_handler(
+@cached("search-issues")
+async def search_issues_handler_async(
     query: str,
     sort: str = "created",
     order: str = "desc",
     per_page: int = 30,
     page: int = 1,
+    output: str = "raw",
+    fields: List[str] | None = None,
+    max_output_bytes: int | None = None,
+    local: bool = True,
+    shard: bool = False,
+    max_items: int | None = None,
 ):
     """Search for issues using GitHub API"""
 
-    # Get GitHub token from environment
-    github_token = os.getenv("GITHUB_TOKEN")
-
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "Braintrust-GitHub-Tools",
-    }
-
-    if github_token:
-        headers["Authorization"] = f"Bearer {github_token}"
+    projected = wants_projection(output, fields)
 
     # Build the search URL
-    url = "https://api.github.com/search/issues"
+    url = f"{GITHUB_API_URL}/search/issues"
 
     query_params = {
         "q": query,
@@ -93,25 +102,48 @@ def search_issues_handler(
         "page": page,
     }
 
-    try:
-        response = requests.get(url, headers=headers, params=query_params)
-        response.raise_for_status()
-
-        # Return the raw JSON response
-        return response.json()
-
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"GitHub API request failed: {str(e)}")
-    except KeyError as e:
-        raise Exception(f"Unexpected response format: {str(e)}")
-
-
-project = braintrust.projects.create(name="github-tools")
-
-search_issues = project.tools.create(
-    name="Search GitHub Issues",
-    slug="search-issues",
-    description="""
+    # Sharded searches return up to max_items results in one page
+    if shard:
+        per_page, page = max_items or DEFAULT_MAX_ITEMS, 1
+
+    # Synced repositories are searched locally, sparing the search API's rate limit
+    results = None
+    if local:
+        results = await get_issue_index().search_async(
+            query, sort=sort, order=order, per_page=per_page, page=page
+        )
+    if results is None and shard:
+        results = await search_sharded_async(query, sort=sort, order=order, max_items=max_items)
+    elif results is None:
+        results = await github_get_async(url, params=query_params)
+
+    # Only the items are budgeted, counts are kept as-is
+    if max_output_bytes:
+        transform = (
+            (lambda page: project_response(page, SearchIssue, fields)) if projected else None
+        )
+        budgeted = await collect_within_budget(
+            single_page(results["items"]),
+            max_output_bytes,
+            expected_items=per_page,
+            transform=transform,
+        )
+        return {**results, **budgeted}
+
+    # Only the items are trimmed, counts are kept as-is
+    if projected:
+        return {**results, "items": project_response(results["items"], SearchIssue, fields)}
+
+    # Return the raw JSON response
+    return results
+
+
+search_issues_handler = sync_handler(search_issues_handler_async)
+
+TOOL = {
+    "name": "Search GitHub Issues",
+    "slug": "search-issues",
+    "description": """
     Search for issues across GitHub repositories using powerful query syntax.
     
     Query examples:
@@ -124,10 +156,30 @@ search_issues = project.tools.create(
     - "language:python type:issue" - Issues in Python repositories
     - "involves:username" - Issues involving specific user
     
+    Output options:
+    - output: "raw" (full GitHub JSON) or "projected" (only SearchIssue model fields)
+    - fields: keep only these item fields, e.g. ["number", "title", "repository_url"]
+    - max_output_bytes: fit the items into this many bytes by truncating
+      bodies and dropping low-value fields; adds an "elided" report of what was cut
+
+    Queries on one repository kept in the local issue sync store (see
+    list-issues sync) are answered locally, marked "source": "local", when
+    they use only free text, repo:, is:, state:, type:, label:, author:,
+    assignee:, created: and updated:. Set local=false to always ask GitHub.
+
+    Sharding:
+    - shard: get past the search API's 1000-result cap by splitting the
+      query into created: date windows fetched in parallel; returns up to
+      max_items results (default 2000, at most 10000) in one page, plus
+      "shards" and "requests" counts. Each window costs search requests,
+      which are limited to 30 a minute
+    
     More powerful than listing issues from a single repository.
     Results include repository context and can guide further exploration.
     """,
-    handler=search_issues_handler,
-    parameters=SearchIssuesParams,
-    if_exists="replace",
-)
+    "handler": search_issues_handler,
+    "parameters": SearchIssuesParams,
+}
+
+# Registered with Braintrust on first access to `search_issues`, see tool_registry.py
+__getattr__ = lazy_tool("search_issues", TOOL)
@@ -5,13 +5,15 @@ This tool searches for repositories on GitHub based on various criteria.
 The output provides repository details that can be used by other tools.
 """
 
-import os
 from typing import List, Optional
 
-import braintrust
-import requests
 from pydantic import BaseModel
 
+from github_client import GITHUB_API_URL, github_get_async, sync_handler
+from projection import project_response, wants_projection
+from response_cache import cached
+from tool_registry import lazy_tool
+
 
 class RepositorySearchParams(BaseModel):
     query: str
@@ -19,6 +21,8 @@ class RepositorySearchParams(BaseModel):
     order: Optional[str] = "desc"  # asc, desc
     per_page: Optional[int] = 10  # max 100
     page: Optional[int] = 1
+    output: Optional[str] = "raw"  # raw, projected (trimmed to the model fields)
+    fields: Optional[List[str]] = None  # only these item fields, e.g. ["full_name", "language"]
 
 
 class Repository(BaseModel):
@@ -44,28 +48,22 @@ class SearchRepositoriesResponse(BaseModel):
     items: List[Repository]
 
 
-def search_repositories_handler(
+@cached("search-repositories")
+async def search_repositories_handler_async(
     query: str,
     sort: str = "stars",
     order: str = "desc",
     per_page: int = 10,
     page: int = 1,
+    output: str = "raw",
+    fields: List[str] | None = None,
 ):
     """Search for repositories using GitHub API"""
 
-    # Get GitHub token from environment
-    github_token = os.getenv("GITHUB_TOKEN")
-
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "Braintrust-GitHub-Tools",
-    }
-
-    if github_token:
-        headers["Authorization"] = f"Bearer {github_token}"
+    projected = wants_projection(output, fields)
 
     # Build the search URL
-    url = "https://api.github.com/search/repositories"
+    url = f"{GITHUB_API_URL}/search/repositories"
 
     query_params = {
         "q": query,
@@ -75,25 +73,22 @@ def search_repositories_handler(
         "page": page,
     }
 
-    try:
-        response = requests.get(url, headers=headers, params=query_params)
-        response.raise_for_status()
+    results = await github_get_async(url, params=query_params)
 
-        # Return the raw JSON response
-        return response.json()
+    # Only the items are trimmed, counts are kept as-is
+    if projected:
+        return {**results, "items": project_response(results["items"], Repository, fields)}
 
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"GitHub API request failed: {str(e)}")
-    except KeyError as e:
-        raise Exception(f"Unexpected response format: {str(e)}")
+    # Return the raw JSON response
+    return results
 
 
-project = braintrust.projects.create(name="github-tools")
+search_repositories_handler = sync_handler(search_repositories_handler_async)
 
-search_repositories = project.tools.create(
-    name="Search GitHub Repositories",
-    slug="search-repositories",
-    description="""
+TOOL = {
+    "name": "Search GitHub Repositories",
+    "slug": "search-repositories",
+    "description": """
     Search for repositories on GitHub based on query parameters.
     
     Query examples:
@@ -103,10 +98,16 @@ search_repositories = project.tools.create(
     - "org:google" - Repositories owned by Google organization
     - "created:>2023-01-01" - Repos created after Jan 1, 2023
     
+    Output options:
+    - output: "raw" (full GitHub JSON) or "projected" (only Repository model fields)
+    - fields: keep only these item fields, e.g. ["full_name", "stargazers_count"]
+    
     Results include repository details that can be used with other GitHub tools
     like listing issues, PRs, or getting repository contents.
     """,
-    handler=search_repositories_handler,
-    parameters=RepositorySearchParams,
-    if_exists="replace",
-)
+    "handler": search_repositories_handler,
+    "parameters": RepositorySearchParams,
+}
+
+# Registered with Braintrust on first access to `search_repositories`, see tool_registry.py
+__getattr__ = lazy_tool("search_repositories", TOOL)
@@ -0,0 +1,240 @@
+"""
+Date-range sharding for issue searches past the 1000-result cap
+
+The search API returns at most 1000 results per query (10 pages of 100),
+and flags heavy queries with `incomplete_results`. A sharded search splits
+the query into `created:` windows small enough to be returned whole:
+
+- The query is probed once for its `total_count`. Queries within the
+  cap are simply paged, in parallel
+- Otherwise the range between the oldest and newest match is cut into
+  windows sized from `total_count`. A window whose own count is still
+  over the cap is split again, in proportion to its count, down to
+  one-second windows
+- The remaining pages of every window are fetched in parallel, with at
+  most GITHUB_TOOLS_SEARCH_CONCURRENCY requests in flight. Every request
+  is also paced by the search rate limit (30 a minute) in `rate_limit.py`
+- Windows are walked in creation order, newest first unless
+  `sort=created&order=asc`. They are only probed, split or fetched once
+  the walk is about to reach them, and the walk stops as soon as
+  `max_items` results are covered
+- Results are deduplicated by `id` and ordered by the requested sort.
+  That order is exact for `sort=created`; other sorts only order the
+  windows fetched, and say so with `incomplete_results` when the walk
+  stopped early
+
+A `created:` qualifier already in the query bounds the whole range and is
+replaced by each window's.
+
+Tuning (environment variables):
+- GITHUB_TOOLS_SEARCH_CONCURRENCY: search requests in flight (default 4)
+"""
+
+import asyncio
+import contextlib
+import math
+import os
+import re
+from datetime import datetime, timedelta
+
+from github_client import GITHUB_API_URL, MAX_PER_PAGE, github_get_async, parse_timestamp
+
+SEARCH_CONCURRENCY = int(os.getenv("GITHUB_TOOLS_SEARCH_CONCURRENCY", "4"))
+
+# The most results the search API returns for one query
+SEARCH_CAP = 1000
+# Windows are sized for this many results, leaving room for uneven spread
+WINDOW_TARGET = 800
+# Pieces of a split window probed ahead of the walk
+LOOKAHEAD = 2
+DEFAULT_MAX_ITEMS = 2000
+MAX_ITEMS = 10000
+
+_CREATED = re.compile(r'(?<!\S)created:("[^"]*"|\S+)')
+
+_SORT_KEYS = {
+    "created": lambda item: item["created_at"],
+    "updated": lambda item: item["updated_at"],
+    "comments": lambda item: item.get("comments") or 0,
+    "reactions": lambda item: (item.get("reactions") or {}).get("total_count", 0),
+    "interactions": lambda item: (item.get("reactions") or {}).get("total_count", 0)
+    + (item.get("comments") or 0),
+}
+
+
+def _format(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+
+
+def _window_query(query: str, start: datetime, end: datetime) -> str:
+    base = _CREATED.sub("", query).strip()
+    return f"{base} created:{_format(start)}..{_format(end)}".strip()
+
+
+class _Search:
+    """One sharded search: its query, traversal order and request limiter"""
+
+    def __init__(self, query: str, order: str, concurrency: int):
+        self.query = query
+        self.order = order  # "desc" walks windows newest first
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.requests = 0
+        self.windows = 0
+        self.incomplete = False
+
+    async def page(self, query: str, page: int = 1, order: str | None = None, per_page=MAX_PER_PAGE):
+        params = {
+            "q": query,
+            "sort": "created",
+            "order": order or self.order,
+            "per_page": per_page,
+            "page": page,
+        }
+        async with self.semaphore:
+            self.requests += 1
+            return await github_get_async(f"{GITHUB_API_URL}/search/issues", params=params)
+
+    def _pieces(self, start: datetime, end: datetime, total: int) -> list:
+        """Cut a window into about total / WINDOW_TARGET disjoint windows, in walk order"""
+
+        seconds = int((end - start).total_seconds())
+        count = max(2, min(math.ceil(total / WINDOW_TARGET), seconds + 1))
+        step = (seconds + 1) / count
+        bounds = [start + timedelta(seconds=int(i * step)) for i in range(count)]
+        bounds.append(end + timedelta(seconds=1))
+        # Windows include both ends, so each one stops a second before the next
+        pieces = [
+            (low, high - timedelta(seconds=1)) for low, high in zip(bounds, bounds[1:]) if high > low
+        ]
+        return pieces[::-1] if self.order == "desc" else pieces
+
+    async def leaves(self, start: datetime, end: datetime, probe: dict):
+        """Yield (query, first page) for windows within the cap, in walk order.
+
+        `probe` is the window's first page. Windows over the cap, or that
+        GitHub couldn't search completely, are split. Pieces are probed in
+        walk order, LOOKAHEAD ahead of the one being walked, so a walk that
+        stops early leaves the rest of the range unprobed.
+        """
+
+        over = probe["total_count"] > SEARCH_CAP or probe.get("incomplete_results")
+        if not over or end <= start:
+            if over:
+                # A one-second window can't be split further
+                self.incomplete = True
+            self.windows += 1
+            yield _window_query(self.query, start, end), probe
+            return
+
+        pieces = self._pieces(start, end, probe["total_count"])
+
+        def probe_piece(index: int) -> asyncio.Future:
+            low, high = pieces[index]
+            return asyncio.ensure_future(self.page(_window_query(self.query, low, high)))
+
+        probes = [probe_piece(index) for index in range(min(LOOKAHEAD, len(pieces)))]
+        try:
+            for index, (low, high) in enumerate(pieces):
+                if index + LOOKAHEAD < len(pieces):
+                    probes.append(probe_piece(index + LOOKAHEAD))
+                piece_probe = await probes[index]
+                async for leaf in self.leaves(low, high, piece_probe):
+                    yield leaf
+        finally:
+            # The walk stopped early, or failed: drop the probes ahead of it
+            for pending in probes:
+                pending.cancel()
+
+    async def rest(self, leaf: tuple, limit: int) -> list:
+        """Up to `limit` items of a window within the cap, starting from its first page"""
+
+        query, probe = leaf
+        pages = math.ceil(min(probe["total_count"], SEARCH_CAP, limit) / MAX_PER_PAGE)
+        results = await asyncio.gather(*(self.page(query, page) for page in range(2, pages + 1)))
+        for result in results:
+            if result.get("incomplete_results"):
+                self.incomplete = True
+        return probe["items"] + [item for result in results for item in result["items"]]
+
+
+async def search_sharded_async(
+    query: str,
+    sort: str | None = "created",
+    order: str = "desc",
+    max_items: int | None = None,
+    concurrency: int = SEARCH_CONCURRENCY,
+) -> dict:
+    """Search issues past the 1000-result cap by splitting on `created:` windows.
+
+    Returns the search API's shape with up to `max_items` items, plus
+    "shards" (windows searched) and "requests" (search API calls made).
+    """
+
+    if sort and sort not in _SORT_KEYS and sort != "best-match":
+        raise Exception(f"Invalid sort: {sort}")
+    max_items = max(1, min(max_items or DEFAULT_MAX_ITEMS, MAX_ITEMS))
+
+    # Walk windows oldest first only when that is the order asked for
+    walk = "asc" if sort == "created" and order == "asc" else "desc"
+    search = _Search(query, walk, concurrency)
+
+    # The probe finds the total and one end of the range, the other end takes one more result
+    first = await search.page(query)
+    total = first["total_count"]
+    other = None
+    if first["items"] and (total > SEARCH_CAP or first.get("incomplete_results")):
+        other = await search.page(query, order="desc" if walk == "asc" else "asc", per_page=1)
+
+    def wanted(covered: int) -> int:
+        # Other sorts need every result of a window to order it
+        return max_items - covered if sort == "created" else SEARCH_CAP
+
+    tasks = []
+    covered = 0
+    skipped = False
+    try:
+        if not other or not other["items"]:
+            # Within the cap: no windows needed
+            search.windows = 1
+            tasks.append(asyncio.ensure_future(search.rest((query, first), wanted(0))))
+        else:
+            ends = sorted(
+                parse_timestamp(result["items"][0]["created_at"]) for result in (first, other)
+            )
+            # Fetch windows as they are found, stopping once max_items are covered
+            async with contextlib.aclosing(search.leaves(ends[0], ends[1], first)) as leaves:
+                async for leaf in leaves:
+                    tasks.append(asyncio.ensure_future(search.rest(leaf, wanted(covered))))
+                    covered += min(leaf[1]["total_count"], SEARCH_CAP)
+                    if covered >= max_items:
+                        # Stop before the next window is even probed
+                        skipped = covered < total
+                        break
+        batches = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    items = []
+    seen = set()
+    for batch in batches:
+        for item in batch:
+            if item["id"] not in seen:
+                seen.add(item["id"])
+                items.append(item)
+
+    # Scores from different windows aren't comparable, but are the best there is
+    if sort in _SORT_KEYS:
+        items.sort(key=_SORT_KEYS[sort], reverse=order != "asc")
+    else:
+        items.sort(key=lambda item: item.get("score") or 0, reverse=True)
+
+    return {
+        "total_count": total,
+        # Other sorts are only ordered within the windows fetched
+        "incomplete_results": search.incomplete or (skipped and sort != "created"),
+        "items": items[:max_items],
+        "shards": search.windows,
+        "requests": search.requests,
+    }
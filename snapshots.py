@@ -0,0 +1,413 @@
+"""
+Local repository snapshots for the Braintrust GitHub tools
+
+Browsing a codebase through `repository-contents` costs one API call per
+directory or file. A snapshot downloads the repository tarball for a
+commit once and answers every later contents, tree and file request for
+that (owner, repo, commit) locally.
+
+- The tarball is unpacked into one data file holding every file's bytes
+  back to back, plus a JSON index of path -> (offset, size, mode, sha)
+- The data file is memory-mapped, so reading a file or a range of it only
+  touches those pages
+- Git blob and tree SHAs are computed while unpacking, so entries carry
+  the same SHAs the API would return
+- Snapshots live under one directory and are evicted least recently used
+  once their total size passes a quota. Writes go through a temporary
+  directory and an atomic rename, so processes can share the directory
+
+Refs are resolved to commit SHAs first; branch and tag resolutions are
+reused for the repository-contents TTL.
+
+Tuning (environment variables):
+- GITHUB_TOOLS_SNAPSHOT_DIR: where snapshots are kept (default: a temp dir)
+- GITHUB_TOOLS_SNAPSHOT_MAX_BYTES: disk quota for all snapshots (default 2GB)
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from github_client import GITHUB_API_URL, github_get_async, github_stream_async
+from response_cache import TOOL_TTLS
+
+DEFAULT_SNAPSHOT_DIR = os.getenv(
+    "GITHUB_TOOLS_SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "github-tools-snapshots")
+)
+DEFAULT_MAX_BYTES = int(
+    os.getenv("GITHUB_TOOLS_SNAPSHOT_MAX_BYTES", str(2 * 1024 * 1024 * 1024))
+)
+
+# Snapshots kept open (index loaded, data file mapped) at once
+MAX_OPEN = 8
+
+DATA_FILE = "data.bin"
+INDEX_FILE = "index.json"
+
+_COMMIT_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+
+def _git_sha(kind: bytes, data: bytes) -> str:
+    return hashlib.sha1(b"%s %d\0" % (kind, len(data)) + data).hexdigest()
+
+
+def _tree_shas(entries: dict) -> None:
+    """Fill in git tree SHAs for every directory entry, deepest first"""
+
+    children: dict = {}
+    for path, entry in entries.items():
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        children.setdefault(parent, []).append((path.rsplit("/", 1)[-1], entry))
+
+    for directory in sorted(children, key=lambda p: p.count("/") + bool(p), reverse=True):
+        # git sorts tree entries by name, with a trailing "/" for subtrees
+        items = sorted(
+            children[directory],
+            key=lambda item: item[0] + "/" if item[1]["type"] == "dir" else item[0],
+        )
+        body = b"".join(
+            b"%s %s\0" % (entry["mode"].lstrip("0").encode(), name.encode())
+            + bytes.fromhex(entry["sha"])
+            for name, entry in items
+            # Empty directories aren't part of a git tree
+            if entry["sha"] is not None
+        )
+        sha = _git_sha(b"tree", body)
+        if directory:
+            entries[directory]["sha"] = sha
+
+
+class Snapshot:
+    """One unpacked commit: a path index and a memory-mapped data file"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.commit = index["commit"]
+        self.entries: dict = index["entries"]
+
+        self._file = open(os.path.join(directory, DATA_FILE), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap can't map an empty file
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._touched = 0.0
+        self.touch()
+
+    def touch(self):
+        # The index file's mtime records last use, for LRU across processes
+        if time.time() - self._touched < 60:
+            return
+        self._touched = time.time()
+        try:
+            os.utime(os.path.join(self.directory, INDEX_FILE))
+        except OSError:
+            pass
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            try:
+                self._data.close()
+            except BufferError:
+                # A read still holds a view, the mapping goes when it does
+                pass
+        self._file.close()
+
+    def entry(self, path: str) -> dict | None:
+        return self.entries.get(path.strip("/"))
+
+    def read(self, path: str):
+        """A file's contents as a zero-copy view into the mapped data"""
+
+        entry = self.entry(path)
+        if entry is None or entry["type"] == "dir":
+            return None
+        return memoryview(self._data)[entry["offset"] : entry["offset"] + entry["size"]]
+
+    def list(self, path: str = "") -> list:
+        """Direct children of a directory, in contents API order"""
+
+        base = path.strip("/")
+        prefix = base + "/" if base else ""
+        return [
+            dict(entry, path=child, name=child[len(prefix) :])
+            for child, entry in self.entries.items()
+            if child.startswith(prefix) and "/" not in child[len(prefix) :]
+        ]
+
+    def tree(self) -> list:
+        """Every entry, shaped like `git_trees.list_tree_async` entries"""
+
+        return [
+            {
+                "path": path,
+                "type": entry["type"],
+                "sha": entry["sha"],
+                "size": entry["size"] if entry["type"] != "dir" else None,
+                "mode": entry["mode"],
+            }
+            for path, entry in self.entries.items()
+        ]
+
+
+def _unpack(archive: str, directory: str, commit: str) -> None:
+    """Unpack a tarball into a data file and index under `directory`"""
+
+    entries: dict = {}
+    offset = 0
+    with tarfile.open(archive, "r:gz") as tar, open(
+        os.path.join(directory, DATA_FILE), "wb"
+    ) as data:
+        for member in tar:
+            # Drop the "owner-repo-sha/" directory every path starts with
+            parts = member.name.split("/", 1)
+            if len(parts) < 2 or not parts[1]:
+                continue
+            path = parts[1].rstrip("/")
+
+            if member.isdir():
+                entries[path] = {
+                    "type": "dir",
+                    "mode": "040000",
+                    "offset": 0,
+                    "size": 0,
+                    "sha": None,
+                }
+                continue
+            if member.issym():
+                contents = member.linkname.encode()
+                kind, mode = "symlink", "120000"
+            elif member.isfile():
+                contents = tar.extractfile(member).read()
+                kind = "file"
+                mode = "100755" if member.mode & 0o111 else "100644"
+            else:
+                continue
+
+            data.write(contents)
+            entries[path] = {
+                "type": kind,
+                "mode": mode,
+                "offset": offset,
+                "size": len(contents),
+                "sha": _git_sha(b"blob", contents),
+            }
+            offset += len(contents)
+
+    _tree_shas(entries)
+    with open(os.path.join(directory, INDEX_FILE), "w") as f:
+        json.dump({"commit": commit, "entries": dict(sorted(entries.items()))}, f)
+
+
+def _directory_size(directory: str) -> int:
+    total = 0
+    for name in (DATA_FILE, INDEX_FILE):
+        try:
+            total += os.path.getsize(os.path.join(directory, name))
+        except OSError:
+            pass
+    return total
+
+
+class SnapshotStore:
+    """Snapshots on disk under a quota, with the most recent ones kept open"""
+
+    def __init__(self, root: str = DEFAULT_SNAPSHOT_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+
+        # (owner, repo, commit) -> Snapshot, least recently used first
+        self._open: OrderedDict = OrderedDict()
+        # (owner, repo, ref) -> (expires_at, commit)
+        self._refs: dict = {}
+        self._lock = threading.Lock()
+        self._building: dict = {}
+
+        self.downloads = 0
+        self.hits = 0
+
+    def _directory(self, owner: str, repo: str, commit: str) -> str:
+        return os.path.join(self.root, owner.lower(), repo.lower(), commit)
+
+    async def resolve(self, owner: str, repo: str, ref: str | None) -> str:
+        """Commit SHA a ref points at"""
+
+        commit = self.known_commit(owner, repo, ref)
+        if commit is not None:
+            return commit
+
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{ref or 'HEAD'}"
+        commit = (await github_get_async(url))["sha"]
+        expires_at = time.time() + TOOL_TTLS["repository-contents"]
+        self._refs[(owner.lower(), repo.lower(), ref or "")] = (expires_at, commit)
+        return commit
+
+    def find(self, owner: str, repo: str, commit: str) -> Snapshot | None:
+        """An already downloaded snapshot, opening it if needed"""
+
+        key = (owner.lower(), repo.lower(), commit)
+        with self._lock:
+            snapshot = self._open.get(key)
+            if snapshot is not None:
+                self._open.move_to_end(key)
+                self.hits += 1
+        if snapshot is not None:
+            snapshot.touch()
+            return snapshot
+
+        directory = self._directory(owner, repo, commit)
+        if not os.path.exists(os.path.join(directory, INDEX_FILE)):
+            return None
+
+        snapshot = Snapshot(directory)
+        with self._lock:
+            self._open[key] = snapshot
+            self.hits += 1
+            while len(self._open) > MAX_OPEN:
+                _, evicted = self._open.popitem(last=False)
+                evicted.close()
+        return snapshot
+
+    def known_commit(self, owner: str, repo: str, ref: str | None) -> str | None:
+        """Commit SHA for a ref if it can be told without a request"""
+
+        if ref and _COMMIT_SHA.match(ref):
+            return ref
+        found = self._refs.get((owner.lower(), repo.lower(), ref or ""))
+        if found and found[0] > time.time():
+            return found[1]
+        return None
+
+    async def get(self, owner: str, repo: str, ref: str | None, create: bool = True):
+        """The snapshot for a ref, downloading it when `create` is set.
+
+        Without `create`, only returns a snapshot that exists already and
+        whose commit is known without an API call.
+        """
+
+        if create:
+            commit = await self.resolve(owner, repo, ref)
+        else:
+            commit = self.known_commit(owner, repo, ref)
+            if commit is None:
+                return None
+
+        snapshot = self.find(owner, repo, commit)
+        if snapshot is not None or not create:
+            return snapshot
+
+        # Concurrent requests for the same commit share one download
+        key = (owner.lower(), repo.lower(), commit)
+        task = self._building.get(key)
+        if task is None:
+            # Outside the caller's context, so its deadline doesn't cut the shared download short
+            task = asyncio.get_running_loop().create_task(
+                self._download(owner, repo, commit), context=contextvars.Context()
+            )
+            self._building[key] = task
+            task.add_done_callback(lambda _: self._building.pop(key, None))
+        await asyncio.shield(task)
+        return self.find(owner, repo, commit)
+
+    async def _download(self, owner: str, repo: str, commit: str):
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        archive = os.path.join(staging, "archive.tar.gz")
+        try:
+            url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/tarball/{commit}"
+            response = await github_stream_async(url)
+            try:
+                with open(archive, "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        f.write(chunk)
+            finally:
+                await response.aclose()
+
+            await asyncio.to_thread(_unpack, archive, staging, commit)
+            os.remove(archive)
+
+            directory = self._directory(owner, repo, commit)
+            os.makedirs(os.path.dirname(directory), exist_ok=True)
+            try:
+                os.rename(staging, directory)
+            except OSError:
+                # Another process finished the same snapshot first
+                shutil.rmtree(staging, ignore_errors=True)
+            self.downloads += 1
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        await asyncio.to_thread(self.enforce_quota)
+
+    def _snapshot_directories(self) -> list:
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for owner in os.listdir(self.root):
+            owner_dir = os.path.join(self.root, owner)
+            if owner.startswith(".") or not os.path.isdir(owner_dir):
+                continue
+            for repo in os.listdir(owner_dir):
+                repo_dir = os.path.join(owner_dir, repo)
+                for commit in os.listdir(repo_dir):
+                    directory = os.path.join(repo_dir, commit)
+                    index = os.path.join(directory, INDEX_FILE)
+                    if os.path.exists(index):
+                        found.append((os.path.getmtime(index), directory, (owner, repo, commit)))
+        return found
+
+    def enforce_quota(self) -> int:
+        """Delete least recently used snapshots until under the quota"""
+
+        snapshots = sorted(self._snapshot_directories())
+        total = sum(_directory_size(directory) for _, directory, _ in snapshots)
+        removed = 0
+        for _, directory, key in snapshots:
+            if total <= self.max_bytes:
+                break
+            with self._lock:
+                snapshot = self._open.pop(key, None)
+            if snapshot is not None:
+                snapshot.close()
+            total -= _directory_size(directory)
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        snapshots = self._snapshot_directories()
+        return {
+            "snapshots": len(snapshots),
+            "bytes": sum(_directory_size(directory) for _, directory, _ in snapshots),
+            "max_bytes": self.max_bytes,
+            "open": len(self._open),
+            "downloads": self.downloads,
+            "hits": self.hits,
+            "root": self.root,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_snapshot_store() -> SnapshotStore:
+    """Return the process-wide snapshot store"""
+
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SnapshotStore()
+    return _store
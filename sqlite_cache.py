@@ -0,0 +1,164 @@
+"""
+Persistent SQLite response cache for the Braintrust GitHub tools
+
+An optional second cache tier that survives process restarts and is shared
+by every worker process pointed at the same file. It sits behind the
+in-memory cache in `response_cache.py`: memory misses fall through to disk,
+and fresh responses are written to both.
+
+- Single file, WAL journal mode so readers never block the writer
+- Entries expire by wall-clock TTL, so all processes agree on freshness
+- Bodies are stored as zlib-compressed JSON
+- A periodic sweep drops expired rows, then least recently used rows until
+  the file's payload is under the size bound
+
+Enable by setting GITHUB_TOOLS_CACHE_PATH to a file path.
+
+Tuning (environment variables):
+- GITHUB_TOOLS_CACHE_PATH: SQLite file to use (disabled when unset)
+- GITHUB_TOOLS_CACHE_DISK_MAX_BYTES: compressed payload bound (default 256MB)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_DISK_MAX_BYTES = int(
+    os.getenv("GITHUB_TOOLS_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024))
+)
+
+# Run an eviction sweep after this many writes
+SWEEP_INTERVAL = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class SQLiteCache:
+    """Cross-process response cache stored in a single SQLite file"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared across threads, keep one each
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Return (True, value, expires_at) for a fresh entry, otherwise (False, None, None)"""
+
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT expires_at, body FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] <= now:
+            return False, None, None
+
+        conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return True, json.loads(zlib.decompress(row[1])), row[0]
+
+    def set(self, tool: str, key: str, value, ttl: float):
+        """Store a response for `ttl` seconds"""
+
+        now = time.time()
+        body = zlib.compress(json.dumps(value, separators=(",", ":"), default=str).encode())
+        if len(body) > self.max_bytes:
+            return
+
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses "
+            "(key, tool, expires_at, accessed_at, size, body) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, tool, now + ttl, now, len(body), body),
+        )
+
+        with self._writes_lock:
+            self._writes += 1
+            should_sweep = self._writes % SWEEP_INTERVAL == 0
+        if should_sweep:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Drop expired entries, then LRU entries until under max_bytes"""
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                excess = total - self.max_bytes
+                victims = []
+                for key, size in conn.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at"
+                ):
+                    victims.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+                removed += len(victims)
+
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return removed
+
+    def clear(self):
+        self._connect().execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        entries, total = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        return {"entries": entries, "bytes": total, "path": self.path}
+
+
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache() -> SQLiteCache | None:
+    """Return the shared on-disk cache, or None when GITHUB_TOOLS_CACHE_PATH is unset"""
+
+    global _disk_cache
+    path = os.getenv("GITHUB_TOOLS_CACHE_PATH")
+    if not path:
+        return None
+
+    if _disk_cache is None or _disk_cache.path != path:
+        with _disk_cache_lock:
+            if _disk_cache is None or _disk_cache.path != path:
+                _disk_cache = SQLiteCache(path)
+    return _disk_cache
@@ -0,0 +1,136 @@
+"""
+GitHub token pool for the Braintrust GitHub tools
+
+Each GitHub token has its own hourly quota. With several tokens configured,
+every request is sent with the token that has the most remaining budget
+for the resource it hits (core, search or graphql), so throughput scales
+with the number of tokens.
+
+A token whose budget is exhausted, or that was rate limited, is skipped
+until its reset or backoff time passes (the budgets live in the rate limit
+scheduler, see `rate_limit.py`). A token GitHub rejects as invalid is
+quarantined for an hour.
+
+Configuration (environment variables):
+- GITHUB_TOKENS: comma-separated list of tokens
+- GITHUB_TOKEN: single token, used when GITHUB_TOKENS is unset
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+from rate_limit import ANONYMOUS, get_scheduler
+
+# How long a token GitHub rejected with 401 is left out of rotation
+INVALID_TOKEN_QUARANTINE = 3600
+
+_RESOURCES = ("core", "search", "graphql")
+
+
+def token_id(token: str | None) -> str:
+    """Stable, non-secret identifier for a token"""
+
+    if not token:
+        return ANONYMOUS
+    return "token-" + hashlib.sha256(token.encode()).hexdigest()[:8]
+
+
+class TokenPool:
+    """Picks the least-loaded token per request and records per-token usage"""
+
+    def __init__(self, tokens: list[str]):
+        # Keep order, drop blanks and duplicates
+        self.tokens = list(dict.fromkeys(t.strip() for t in tokens if t and t.strip()))
+        self._stats = {
+            token_id(token): {"requests": 0, "rate_limited": 0, "errors": 0}
+            for token in self.tokens
+        }
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.tokens)
+
+    def choose(self, resource: str) -> str | None:
+        """Token to use for the next request on `resource`, or None if the pool is empty.
+
+        Prefers tokens usable right now, and among those the one with the
+        most remaining budget. When every token is exhausted, returns the
+        one that frees up first and the scheduler waits for it.
+        """
+
+        if not self.tokens:
+            return None
+
+        scheduler = get_scheduler()
+        best = None
+        best_rank = None
+        for token in self.tokens:
+            remaining, available_in = scheduler.availability(resource, token_id(token))
+            rank = (available_in, -remaining)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = token, rank
+
+        with self._lock:
+            self._stats[token_id(best)]["requests"] += 1
+        return best
+
+    def record(self, token: str | None, status_code: int):
+        """Record a response's outcome against the token that sent it"""
+
+        if not token:
+            return
+
+        tid = token_id(token)
+        with self._lock:
+            if status_code in (403, 429):
+                self._stats[tid]["rate_limited"] += 1
+            elif status_code == 401:
+                self._stats[tid]["errors"] += 1
+
+        if status_code == 401:
+            # Bad or revoked credentials, stop using this token everywhere
+            for resource in _RESOURCES:
+                get_scheduler().block(resource, tid, INVALID_TOKEN_QUARANTINE)
+
+    def stats(self) -> dict:
+        """Usage and remaining budget per token, keyed by token id"""
+
+        scheduler = get_scheduler()
+        with self._lock:
+            usage = {tid: dict(stats) for tid, stats in self._stats.items()}
+
+        now = time.time()
+        for tid, stats in usage.items():
+            budgets = scheduler.token_budgets(tid)
+            stats["budgets"] = budgets
+            stats["quarantined"] = any(
+                b["blocked_for"] > 0 or (b["remaining"] <= 0 and b["reset"] > now)
+                for b in budgets.values()
+            )
+        return usage
+
+
+_pool = None
+_pool_source = None
+_pool_lock = threading.Lock()
+
+
+def get_token_pool() -> TokenPool:
+    """Return the process-wide pool, rebuilt if the token environment changes"""
+
+    global _pool, _pool_source
+    source = os.getenv("GITHUB_TOKENS") or os.getenv("GITHUB_TOKEN") or ""
+    if _pool is None or source != _pool_source:
+        with _pool_lock:
+            if _pool is None or source != _pool_source:
+                _pool = TokenPool(source.split(","))
+                _pool_source = source
+    return _pool
+
+
+def get_token_stats() -> dict:
+    """Per-token usage stats for the configured pool"""
+
+    return get_token_pool().stats()
@@ -0,0 +1,66 @@
+"""
+Lazy Braintrust tool registration for the Braintrust GitHub tools
+
+Importing a tool module only defines its handlers, models and a TOOL spec
+(name, slug, description, handler, parameters); it doesn't import
+braintrust or register anything. A tool is registered the first time its
+tool object is asked for, e.g. `from list_issues import list_issues`, and
+only once per process however often it is asked for again.
+
+`github_tools.py` asks for every tool, so `braintrust push github_tools.py`
+still registers them all.
+"""
+
+import threading
+
+PROJECT_NAME = "github-tools"
+
+_project = None
+_tools: dict = {}
+_lock = threading.RLock()
+
+
+def get_project():
+    """The Braintrust project the tools belong to, created on first use"""
+
+    global _project
+    if _project is None:
+        with _lock:
+            if _project is None:
+                # Deferred: braintrust is by far the slowest import here
+                import braintrust
+
+                _project = braintrust.projects.create(name=PROJECT_NAME)
+    return _project
+
+
+def register_tool(spec: dict):
+    """Register a tool from its spec once, returning the Braintrust tool object"""
+
+    slug = spec["slug"]
+    tool = _tools.get(slug)
+    if tool is None:
+        with _lock:
+            tool = _tools.get(slug)
+            if tool is None:
+                tool = get_project().tools.create(**spec, if_exists="replace")
+                _tools[slug] = tool
+    return tool
+
+
+def lazy_tool(attribute: str, spec: dict):
+    """Module `__getattr__` that registers `spec` when `attribute` is first read"""
+
+    def __getattr__(name: str):
+        if name == attribute:
+            return register_tool(spec)
+        raise AttributeError(name)
+
+    return __getattr__
+
+
+def registered_tools() -> dict:
+    """Tools registered so far, keyed by slug"""
+
+    with _lock:
+        return dict(_tools)
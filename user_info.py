@@ -5,16 +5,20 @@ This tool gets information about GitHub users or organizations.
 Useful for understanding repository owners and contributors.
 """
 
-import os
-from typing import Optional
+from typing import List, Optional
 
-import braintrust
-import requests
 from pydantic import BaseModel
 
+from github_client import GITHUB_API_URL, github_get_async, sync_handler
+from projection import project_response, wants_projection
+from response_cache import cached
+from tool_registry import lazy_tool
+
 
 class UserInfoParams(BaseModel):
     username: str
+    output: Optional[str] = "raw"  # raw, projected (trimmed to the model fields)
+    fields: Optional[List[str]] = None  # only these fields, e.g. ["login", "followers"]
 
 
 class UserInfo(BaseModel):
@@ -45,42 +49,32 @@ class UserInfo(BaseModel):
     updated_at: str
 
 
-def get_user_info_handler(username: str):
+@cached("user-info")
+async def get_user_info_handler_async(
+    username: str, output: str = "raw", fields: List[str] | None = None
+):
     """Get user/organization information using GitHub API"""
 
-    # Get GitHub token from environment
-    github_token = os.getenv("GITHUB_TOKEN")
-
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "User-Agent": "Braintrust-GitHub-Tools",
-    }
-
-    if github_token:
-        headers["Authorization"] = f"Bearer {github_token}"
+    projected = wants_projection(output, fields)
 
     # Build the API URL
-    url = f"https://api.github.com/users/{username}"
+    url = f"{GITHUB_API_URL}/users/{username}"
 
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+    details = await github_get_async(url, hedge=True)
 
-        # Return the raw JSON response
-        return response.json()
+    if projected:
+        return project_response(details, UserInfo, fields)
 
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"GitHub API request failed: {str(e)}")
-    except KeyError as e:
-        raise Exception(f"Unexpected response format: {str(e)}")
+    # Return the raw JSON response
+    return details
 
 
-project = braintrust.projects.create(name="github-tools")
+get_user_info_handler = sync_handler(get_user_info_handler_async)
 
-user_info = project.tools.create(
-    name="Get User/Organization Info",
-    slug="user-info",
-    description="""
+TOOL = {
+    "name": "Get User/Organization Info",
+    "slug": "user-info",
+    "description": """
     Get detailed information about a GitHub user or organization.
     
     Use this tool to:
@@ -95,10 +89,16 @@ user_info = project.tools.create(
     - Contact details (email, blog, Twitter)
     - Account type (User vs Organization)
     
+    Output options:
+    - output: "raw" (full GitHub JSON) or "projected" (only UserInfo model fields)
+    - fields: keep only these fields, e.g. ["login", "name", "followers"]
+    
     This context helps understand the credibility and focus
     of repositories and their maintainers.
     """,
-    handler=get_user_info_handler,
-    parameters=UserInfoParams,
-    if_exists="replace",
-)
+    "handler": get_user_info_handler,
+    "parameters": UserInfoParams,
+}
+
+# Registered with Braintrust on first access to `user_info`, see tool_registry.py
+__getattr__ = lazy_tool("user_info", TOOL)